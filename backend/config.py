@@ -25,3 +25,108 @@ MODEL_PATH = os.path.join(
     "models",
     "best_model.pth"
 )
+
+# Number of images stacked into one forward pass by predict_images()
+BATCH_SIZE = 16
+
+# Cross-session micro-batching for predict_image()
+MICRO_BATCHING = True
+MICRO_BATCH_MAX_SIZE = 16
+MICRO_BATCH_MAX_WAIT_MS = 10
+
+# Forward passes allowed to run on the shared model at the same time.
+# Torch intra-op threads are divided evenly between these slots.
+MODEL_CONCURRENCY = 1
+
+# Backend that runs predictions:
+#   "torch"       – eager SimpleCNN
+#   "torchscript" – TorchScript-frozen copy cached at TORCHSCRIPT_PATH
+#   "onnx"        – ONNX Runtime (CPU) session on the export at ONNX_PATH
+#   "int8"        – statically quantized model at QUANTIZED_MODEL_PATH
+# Derived artifacts are rebuilt whenever the checkpoint changes, except the
+# INT8 model, which needs calibration (python -m backend.models.quantization).
+INFERENCE_BACKEND = "torch"
+TORCHSCRIPT_PATH = os.path.splitext(MODEL_PATH)[0] + ".ts"
+ONNX_PATH = os.path.splitext(MODEL_PATH)[0] + ".onnx"
+QUANTIZED_MODEL_PATH = os.path.splitext(MODEL_PATH)[0] + "_int8.ts"
+QUANTIZATION_ENGINE = "x86"   # "qnnpack" on ARM
+
+# CPU execution mode for the "torch" and "torchscript" backends.
+# "bfloat16" runs convolutions under autocast (fast on AVX512-BF16/AMX CPUs);
+# CHANNELS_LAST stores weights and inputs as NHWC for oneDNN.
+INFERENCE_PRECISION = "float32"
+CHANNELS_LAST = False
+
+# In-process LRU cache of predictions, keyed by decoded-pixel hash and
+# model fingerprint. Evicts past either budget.
+PREDICTION_CACHE = True
+PREDICTION_CACHE_MAX_ENTRIES = 2048
+PREDICTION_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Persistent SQLite + blob store of predictions and heatmaps; warms the
+# in-memory cache on first use so restarts don't recompute known results
+RESULT_STORE = True
+RESULT_STORE_DIR = os.path.join(os.path.dirname(__file__), "result_store")
+
+# Upload decoding limits. Images are decoded to roughly DECODE_TARGET_SIZE
+# on the short side (model input is 224, the UI shows ≤ 320 px).
+DECODE_TARGET_SIZE = 320
+MAX_IMAGE_PIXELS = 50_000_000
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+# Evaluation page: DataLoader worker processes that decode the labeled
+# folder, where the latest results are saved, and where per-image scores
+# are cached (by file content hash and model fingerprint) between runs
+EVALUATION_WORKERS = 2
+EVALUATION_RESULTS_PATH = os.path.join(
+    os.path.dirname(__file__), "evaluation", "results", "latest.npz"
+)
+EVALUATION_CACHE_DIR = os.path.join(
+    os.path.dirname(__file__), "evaluation", "score_cache"
+)
+
+# Bootstrap confidence intervals computed with each evaluation run; chunks
+# of resamples are spread over BOOTSTRAP_WORKERS threads
+BOOTSTRAP_RESAMPLES = 10_000
+BOOTSTRAP_CONFIDENCE = 0.95
+BOOTSTRAP_WORKERS = min(4, os.cpu_count() or 1)
+
+# Top-1 probability cut-offs for the High / Moderate / Low confidence
+# labels. Operating points exported from the Evaluation page to
+# CONFIDENCE_THRESHOLDS_PATH take precedence over these defaults.
+CONFIDENCE_HIGH_THRESHOLD = 0.80
+CONFIDENCE_MODERATE_THRESHOLD = 0.60
+CONFIDENCE_THRESHOLDS_PATH = os.path.join(
+    os.path.dirname(__file__), "confidence_thresholds.json"
+)
+# Accuracy the accepted predictions must reach for each level when the
+# Evaluation page proposes operating points
+CONFIDENCE_HIGH_TARGET_ACCURACY = 0.95
+CONFIDENCE_MODERATE_TARGET_ACCURACY = 0.85
+# Cut-offs accepting fewer images than this (count and share of the set)
+# are ignored as too noisy
+CONFIDENCE_MIN_ACCEPTED = 20
+CONFIDENCE_MIN_COVERAGE = 0.05
+
+# Heatmap method used by predict_and_explain():
+#   "gradcam" – gradient-weighted CAM (backward through the fc head)
+#   "cam"     – forward-only CAM from layer4 activations and fc weights
+#   "gradcam_multilayer" – Grad-CAM on layer2-4 fused at 28x28, one backward
+#   "occlusion" – probability drop under a sliding occluding patch
+#   "integrated_gradients" / "smoothgrad" – per-pixel input attributions
+EXPLAINER = "gradcam"
+
+# Occlusion sensitivity: patch size and stride in model-input pixels, and
+# how many occluded variants go through the model per forward pass
+OCCLUSION_PATCH_SIZE = 32
+OCCLUSION_STRIDE = 16
+OCCLUSION_BATCH_SIZE = 64
+
+# Integrated Gradients interpolation steps, SmoothGrad noise samples (noise
+# std as a fraction of the input range, drawn from SMOOTHGRAD_SEED), and
+# how many of those inputs go through one forward/backward pass
+INTEGRATED_GRADIENTS_STEPS = 32
+SMOOTHGRAD_SAMPLES = 32
+SMOOTHGRAD_NOISE_LEVEL = 0.15
+SMOOTHGRAD_SEED = 0
+ATTRIBUTION_BATCH_SIZE = 16
@@ -0,0 +1 @@
+"""Model evaluation on labeled image folders"""
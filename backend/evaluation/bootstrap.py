@@ -0,0 +1,138 @@
+"""
+Bootstrap confidence intervals over cached predictions
+
+Each chunk of resamples is drawn as one [B, N] index matrix and turned
+into a [B, N] count matrix (how often each image was drawn). Every
+metric is then a matrix operation on those counts: accuracy and
+per-class recall are matrix products, and AUC is the Mann-Whitney
+statistic computed from cumulative counts in score order, ties included.
+No metric code runs once per resample.
+
+Chunks are seeded from one SeedSequence, so for a given chunk_size the
+results don't depend on how many worker threads run them.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def _count_matrix(rng, n, resamples):
+    """[resamples, n] counts of each index in resamples draws of n with replacement"""
+    indices = rng.integers(0, n, size=(resamples, n))
+    offsets = (np.arange(resamples) * n)[:, None]
+    return np.bincount((indices + offsets).ravel(), minlength=resamples * n) \
+        .reshape(resamples, n).astype(np.float32)
+
+
+def _weighted_auc(weights, scores, positives):
+    """
+    ROC-AUC of every row of weights ([B, N] sample multiplicities).
+
+    Sorting is done once on the full scores. Equal scores are grouped so
+    tied positive/negative pairs count one half; without ties the groups
+    are skipped.
+    """
+    order = np.argsort(scores, kind="mergesort")
+    ranked = scores[order]
+    positives = positives[order]
+    w = weights[:, order]
+
+    if np.all(np.diff(ranked) != 0):
+        # Negatives at or below each position, dotted with positive weights
+        negatives_below = np.cumsum(w * ~positives, axis=1)
+        u = (w * negatives_below) @ positives.astype(np.float32)
+        n_pos = w @ positives.astype(np.float32)
+        n_neg = negatives_below[:, -1]
+    else:
+        starts = np.flatnonzero(np.r_[True, np.diff(ranked) != 0])
+        pos = np.add.reduceat(w * positives, starts, axis=1)
+        neg = np.add.reduceat(w * ~positives, starts, axis=1)
+        negatives_below = np.cumsum(neg, axis=1) - neg
+        u = (pos * (negatives_below + 0.5 * neg)).sum(axis=1)
+        n_pos, n_neg = pos.sum(axis=1), neg.sum(axis=1)
+
+    pairs = n_pos.astype(np.float64) * n_neg
+    return np.divide(u, pairs, out=np.full(len(u), np.nan), where=pairs > 0)
+
+
+def _metrics(weights, labels, correct, probabilities, binary):
+    """Accuracy [B], recall [B, C], one-vs-rest AUC [B, C], binary AUC [B]"""
+    num_classes = probabilities.shape[1]
+    onehot = np.eye(num_classes, dtype=np.float32)[labels]
+
+    drawn = weights.sum(axis=1)
+    accuracy = weights @ correct.astype(np.float32) / drawn
+
+    support = weights @ onehot
+    hits = weights @ (onehot * correct[:, None])
+    recall = np.divide(hits, support, out=np.full(hits.shape, np.nan), where=support > 0)
+
+    auc = np.stack([
+        _weighted_auc(weights, probabilities[:, c], labels == c)
+        for c in range(num_classes)
+    ], axis=1)
+
+    binary_auc = None
+    if binary is not None:
+        binary_auc = _weighted_auc(weights, binary[1], binary[0])
+    return accuracy, recall, auc, binary_auc
+
+
+def _interval(estimate, samples, confidence):
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.nanpercentile(samples, [100 * alpha, 100 * (1 - alpha)], axis=0)
+    return {
+        "estimate": np.asarray(estimate).tolist(),
+        "low": np.asarray(low).tolist(),
+        "high": np.asarray(high).tolist(),
+    }
+
+
+def bootstrap_intervals(labels, probabilities, resamples=10_000, confidence=0.95,
+                        chunk_size=1000, workers=1, seed=0, binary=None):
+    """
+    Percentile bootstrap intervals for accuracy, per-class recall and
+    one-vs-rest ROC-AUC.
+
+    binary optionally gives (is_positive [N], scores [N]) for one extra
+    binary AUC (e.g. disease vs normal). Resamples are processed
+    chunk_size at a time (bounding memory at about chunk_size x N floats);
+    workers > 1 runs chunks on a thread pool.
+
+    Returns {"accuracy", "recall", "auc"[, "binary_auc"]} with
+    "estimate" (full data), "low" and "high" each, plus the settings used.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    n = len(labels)
+    if n == 0:
+        raise ValueError("Nothing to resample")
+
+    correct = probabilities.argmax(axis=1) == labels
+    if binary is not None:
+        binary = (np.asarray(binary[0], dtype=bool), np.asarray(binary[1], dtype=np.float64))
+
+    sizes = [min(chunk_size, resamples - start) for start in range(0, resamples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    def run(chunk):
+        size, seed_sequence = chunk
+        weights = _count_matrix(np.random.default_rng(seed_sequence), n, size)
+        return _metrics(weights, labels, correct, probabilities, binary)
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(run, zip(sizes, seeds)))
+    else:
+        parts = [run(chunk) for chunk in zip(sizes, seeds)]
+
+    full = _metrics(np.ones((1, n), dtype=np.float32), labels, correct, probabilities, binary)
+    names = ("accuracy", "recall", "auc", "binary_auc")
+
+    intervals = {"resamples": resamples, "confidence": confidence}
+    for i, name in enumerate(names):
+        if full[i] is None:
+            continue
+        samples = np.concatenate([part[i] for part in parts])
+        intervals[name] = _interval(full[i][0], samples, confidence)
+    return intervals
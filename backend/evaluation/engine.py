@@ -0,0 +1,352 @@
+"""
+Evaluation of the serving model on a labeled image folder
+
+The folder has one sub-folder per class name (see list_labeled_images).
+DataLoader workers decode and resize images in parallel while the main
+process normalizes each batch and scores it through the same backend as
+live predictions (INFERENCE_BACKEND). Per-image probabilities are cached
+per file content and model (score_cache), so later runs only score new
+or changed images. Once every image has a score, the confusion matrix is
+built from the full probabilities array. The probabilities are also
+saved, so ROC / PR curves and their areas can be recomputed from the
+results without rescoring.
+
+    python -m backend.evaluation.engine --data-dir DIR [--workers N]
+
+Results go to EVALUATION_RESULTS_PATH, which the Evaluation page reads.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from backend.evaluation.bootstrap import bootstrap_intervals
+from backend.evaluation.metrics import ConfusionMatrix, auc, one_vs_rest, roc_curve
+from backend.evaluation.score_cache import ScoreCache
+
+NORMAL_CLASS = "normal"
+
+
+# ===============================
+# DATA LOADING
+# ===============================
+class LabeledImageDataset:
+    """
+    (224 x 224 x 3 uint8 array, class_idx, error) triples; decoding runs in
+    workers. A file that can't be decoded gives (None, class_idx, message)
+    instead of raising, so one bad file doesn't stop the run.
+    """
+
+    def __init__(self, samples, target_size, max_pixels=None, max_bytes=None):
+        self.samples = samples
+        self.target_size = target_size
+        self.max_pixels = max_pixels
+        self.max_bytes = max_bytes
+        self._preprocessor = None  # built in each worker, not pickled
+
+    def __len__(self):
+        return len(self.samples)
+
+    def __getitem__(self, index):
+        from backend.models.image_decoding import ImageDecodeError, decode_image
+        from backend.models.preprocessing import Preprocessor
+
+        if self._preprocessor is None:
+            self._preprocessor = Preprocessor()
+
+        path, label = self.samples[index]
+        try:
+            image = decode_image(
+                path,
+                target_size=self.target_size,
+                max_pixels=self.max_pixels,
+                max_bytes=self.max_bytes,
+            )
+        except (ImageDecodeError, OSError) as exc:
+            return None, label, str(exc)
+        return self._preprocessor.to_uint8(image), label, None
+
+
+def _dataset(samples):
+    from backend.config import DECODE_TARGET_SIZE, MAX_IMAGE_PIXELS, MAX_UPLOAD_BYTES
+
+    return LabeledImageDataset(
+        samples, DECODE_TARGET_SIZE, max_pixels=MAX_IMAGE_PIXELS, max_bytes=MAX_UPLOAD_BYTES
+    )
+
+
+def _collate(items):
+    """(decoded arrays, decoded mask [B], error messages of the rest)"""
+    arrays, _, errors = zip(*items)
+    decoded = np.array([array is not None for array in arrays])
+    return (
+        [array for array in arrays if array is not None],
+        decoded,
+        [error for error in errors if error is not None],
+    )
+
+
+def _batches(samples, batch_size, num_workers):
+    from torch.utils.data import DataLoader
+
+    loader = DataLoader(
+        _dataset(samples),
+        batch_size=batch_size,
+        shuffle=False,
+        num_workers=num_workers,
+        collate_fn=_collate,
+    )
+    return iter(loader)
+
+
+# ===============================
+# EVALUATION
+# ===============================
+def evaluate(samples, batch_size=None, num_workers=None, single_image_runs=20,
+             use_cache=True):
+    """
+    Score (path, class_idx) samples and collect everything the Evaluation
+    page shows.
+
+    With use_cache, probabilities already computed by the current model
+    for a file's content are taken from the ScoreCache and only new or
+    changed files go through the model; all metrics are then recomputed
+    from the full probabilities array.
+
+    Files that can't be read or decoded are left out of every metric and
+    listed under "failures" with their error.
+
+    Latency is measured on the model call alone (batched, per image) and
+    on up to single_image_runs batch-1 calls, which is what an interactive
+    upload pays. Bootstrap intervals for accuracy, per-class recall and
+    AUC are computed from the final probabilities. Returns a results dict
+    (see save_results).
+    """
+    from backend.config import (
+        BATCH_SIZE,
+        BOOTSTRAP_CONFIDENCE,
+        BOOTSTRAP_RESAMPLES,
+        BOOTSTRAP_WORKERS,
+        CLASS_NAMES,
+        EVALUATION_CACHE_DIR,
+        EVALUATION_WORKERS,
+    )
+    from backend.models import model_predictor as predictor
+
+    if not samples:
+        raise ValueError("Labeled set is empty")
+
+    batch_size = batch_size or BATCH_SIZE
+    num_workers = EVALUATION_WORKERS if num_workers is None else num_workers
+    fingerprint = predictor.model_fingerprint()
+    labels = np.array([label for _, label in samples], dtype=np.int64)
+
+    if use_cache:
+        cache = ScoreCache(EVALUATION_CACHE_DIR, fingerprint, len(CLASS_NAMES))
+        hashes = cache.file_hashes([path for path, _ in samples])
+        probabilities, missing = cache.lookup(hashes)
+    else:
+        probabilities = np.full((len(samples), len(CLASS_NAMES)), np.nan, dtype=np.float32)
+        missing = np.ones(len(samples), dtype=bool)
+    pending = np.flatnonzero(missing)
+    failed = np.zeros(len(samples), dtype=bool)
+    failures = []
+
+    batch_seconds, batch_sizes = [], []
+    start, done = time.perf_counter(), 0
+    if len(pending):
+        batches = _batches([samples[i] for i in pending], batch_size, num_workers)
+        for arrays, decoded, errors in batches:
+            rows = pending[done:done + len(decoded)]
+            done += len(decoded)
+            failed[rows[~decoded]] = True
+            failures.extend(
+                {"path": samples[i][0], "error": error}
+                for i, error in zip(rows[~decoded], errors)
+            )
+            if not arrays:
+                continue
+
+            batch_start = time.perf_counter()
+            probs = predictor._forward_probs(arrays)
+            batch_seconds.append(time.perf_counter() - batch_start)
+            batch_sizes.append(len(arrays))
+
+            probabilities[rows[decoded]] = probs
+    scoring_seconds = time.perf_counter() - start
+
+    scored = pending[~failed[pending]]
+    if use_cache and len(scored):
+        cache.update([hashes[i] for i in scored], probabilities[scored])
+        cache.save()
+
+    # Unreadable files take no part in any metric
+    kept = ~failed
+    if not kept.any():
+        raise ValueError("None of the labeled images could be decoded")
+    samples = [sample for sample, keep in zip(samples, kept) if keep]
+    labels, probabilities = labels[kept], probabilities[kept]
+
+    confusion = ConfusionMatrix(len(CLASS_NAMES))
+    confusion.update(labels, probabilities.argmax(axis=1))
+
+    intervals = bootstrap_intervals(
+        labels,
+        probabilities,
+        resamples=BOOTSTRAP_RESAMPLES,
+        confidence=BOOTSTRAP_CONFIDENCE,
+        workers=BOOTSTRAP_WORKERS,
+        binary=(
+            labels != CLASS_NAMES.index(NORMAL_CLASS),
+            disease_scores(probabilities, CLASS_NAMES),
+        ),
+    )
+
+    single_seconds = []
+    dataset = _dataset(samples[:single_image_runs])
+    for index in range(len(dataset)):
+        pixels, _, _ = dataset[index]
+        if pixels is None:
+            continue
+        single_start = time.perf_counter()
+        predictor._forward_probs([pixels])
+        single_seconds.append(time.perf_counter() - single_start)
+
+    return {
+        "paths": np.array([path for path, _ in samples]),
+        "labels": labels,
+        "probabilities": probabilities,
+        "confusion": confusion.matrix,
+        "batch_seconds": np.array(batch_seconds),
+        "batch_sizes": np.array(batch_sizes, dtype=np.int64),
+        "single_seconds": np.array(single_seconds),
+        "scoring_seconds": scoring_seconds,
+        "scored": int(len(scored)),
+        "reused": int(len(samples) - len(scored)),
+        "failures": failures,
+        "bootstrap": intervals,
+        "class_names": list(CLASS_NAMES),
+        "model_fingerprint": fingerprint,
+        "created_at": time.time(),
+        "num_workers": num_workers,
+    }
+
+
+# ===============================
+# SUMMARY
+# ===============================
+def disease_scores(probabilities, class_names):
+    """Probability of any disease class, i.e. 1 - P(normal)"""
+    return 1.0 - np.asarray(probabilities)[:, class_names.index(NORMAL_CLASS)]
+
+
+def summarize(results):
+    """Metrics, curves and latency computed from saved results"""
+    class_names = results["class_names"]
+    labels = results["labels"]
+    probabilities = results["probabilities"]
+
+    confusion = ConfusionMatrix(len(class_names))
+    confusion.matrix = np.asarray(results["confusion"], dtype=np.int64)
+
+    is_disease = labels != class_names.index(NORMAL_CLASS)
+    scores = disease_scores(probabilities, class_names)
+    fpr, tpr, _ = roc_curve(is_disease, scores)
+
+    batch_seconds, batch_sizes = results["batch_seconds"], results["batch_sizes"]
+    batch_ms = 1000.0 * batch_seconds / np.maximum(batch_sizes, 1)
+    single_ms = 1000.0 * results["single_seconds"]
+    scored = int(batch_sizes.sum())
+
+    return {
+        "samples": confusion.total,
+        "accuracy": confusion.accuracy,
+        "macro_f1": confusion.macro_f1(),
+        "per_class": confusion.per_class(),
+        "confusion": confusion.matrix,
+        "curves": one_vs_rest(labels, probabilities),
+        "intervals": results.get("bootstrap"),
+        "disease_roc": {"fpr": fpr, "tpr": tpr, "auc": auc(fpr, tpr)},
+        "latency": {
+            # Batched figures cover only the images scored in this run
+            "batched_ms_per_image": (
+                1000.0 * float(batch_seconds.sum()) / scored if scored else None
+            ),
+            "batched_p95_ms_per_image": (
+                float(np.percentile(batch_ms, 95)) if scored else None
+            ),
+            "single_ms_p50": float(np.median(single_ms)) if len(single_ms) else None,
+            "single_ms_p95": float(np.percentile(single_ms, 95)) if len(single_ms) else None,
+            "images_per_second": (
+                scored / results["scoring_seconds"] if scored else None
+            ),
+        },
+    }
+
+
+# ===============================
+# PERSISTENCE
+# ===============================
+_META_FIELDS = (
+    "scoring_seconds", "scored", "reused", "failures", "bootstrap", "class_names",
+    "model_fingerprint", "created_at", "num_workers",
+)
+
+
+def save_results(results, path):
+    """Write results as one .npz (arrays plus a JSON metadata entry)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    arrays = {key: value for key, value in results.items() if key not in _META_FIELDS}
+    meta = {key: results[key] for key in _META_FIELDS}
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_results(path):
+    """Results saved by save_results(), or None if there are none yet"""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        results = {key: data[key] for key in data.files if key != "meta"}
+        results.update(json.loads(str(data["meta"])))
+    return results
+
+
+def main(argv=None):
+    from backend.config import CLASS_NAMES, EVALUATION_RESULTS_PATH
+    from backend.models.image_folders import list_labeled_images
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", required=True,
+                        help="Labeled folder (one sub-folder per class)")
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--workers", type=int, help="DataLoader worker processes")
+    parser.add_argument("--out", default=EVALUATION_RESULTS_PATH)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Rescore every image instead of reusing cached scores")
+    args = parser.parse_args(argv)
+
+    samples = list_labeled_images(args.data_dir, CLASS_NAMES)
+    results = evaluate(samples, batch_size=args.batch_size, num_workers=args.workers,
+                       use_cache=not args.no_cache)
+    save_results(results, args.out)
+
+    summary = summarize(results)
+    print(f"✅ Evaluated {summary['samples']} images "
+          f"({results['scored']} scored, {results['reused']} from cache): "
+          f"accuracy {summary['accuracy']:.3f}, macro F1 {summary['macro_f1']:.3f}")
+    for failure in results["failures"]:
+        print(f"⚠️ Skipped {failure['path']}: {failure['error']}")
+    accuracy = summary["intervals"]["accuracy"]
+    print(f"   accuracy {summary['intervals']['confidence']:.0%} CI: "
+          f"{accuracy['low']:.3f} – {accuracy['high']:.3f}")
+    print(json.dumps(summary["latency"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
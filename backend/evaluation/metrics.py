@@ -0,0 +1,135 @@
+"""
+Classification metrics over stored scores
+
+Everything is vectorized NumPy: the confusion matrix is updated with one
+bincount per batch, and ROC / PR curves come from a single sort plus
+cumulative sums instead of a loop over thresholds.
+"""
+import numpy as np
+
+
+# ===============================
+# CONFUSION MATRIX
+# ===============================
+class ConfusionMatrix:
+    """Incremental num_classes x num_classes counts (rows = actual)"""
+
+    def __init__(self, num_classes):
+        self.num_classes = num_classes
+        self.matrix = np.zeros((num_classes, num_classes), dtype=np.int64)
+
+    def update(self, labels, predictions):
+        labels = np.asarray(labels, dtype=np.int64)
+        predictions = np.asarray(predictions, dtype=np.int64)
+        n = self.num_classes
+        self.matrix += np.bincount(
+            labels * n + predictions, minlength=n * n
+        ).reshape(n, n)
+
+    @property
+    def total(self):
+        return int(self.matrix.sum())
+
+    @property
+    def accuracy(self):
+        return float(np.trace(self.matrix) / self.total) if self.total else 0.0
+
+    def per_class(self):
+        """Per-class precision, recall, F1 and support as NumPy arrays"""
+        true_positives = np.diag(self.matrix).astype(np.float64)
+        predicted = self.matrix.sum(axis=0)
+        support = self.matrix.sum(axis=1)
+
+        precision = _safe_divide(true_positives, predicted)
+        recall = _safe_divide(true_positives, support)
+        f1 = _safe_divide(2 * precision * recall, precision + recall)
+        return {"precision": precision, "recall": recall, "f1": f1, "support": support}
+
+    def macro_f1(self):
+        return float(self.per_class()["f1"].mean())
+
+
+def _safe_divide(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+# ===============================
+# CURVES
+# ===============================
+def _threshold_counts(y_true, scores):
+    """
+    Cumulative true / false positive counts at every distinct score,
+    highest threshold first. Returns (thresholds, tps, fps).
+    """
+    y_true = np.asarray(y_true, dtype=bool)
+    scores = np.asarray(scores, dtype=np.float64)
+
+    order = np.argsort(-scores, kind="mergesort")
+    scores, y_true = scores[order], y_true[order]
+
+    # Last index of each run of equal scores
+    distinct = np.flatnonzero(np.diff(scores)) if len(scores) > 1 else np.array([], int)
+    ends = np.r_[distinct, len(scores) - 1]
+
+    tps = np.cumsum(y_true)[ends]
+    fps = (ends + 1) - tps
+    return scores[ends], tps, fps
+
+
+def roc_curve(y_true, scores):
+    """(fpr, tpr, thresholds) for a binary problem, starting at (0, 0)"""
+    thresholds, tps, fps = _threshold_counts(y_true, scores)
+    tpr = _safe_divide(np.r_[0, tps], tps[-1] if len(tps) else 0)
+    fpr = _safe_divide(np.r_[0, fps], fps[-1] if len(fps) else 0)
+    return fpr, tpr, np.r_[np.inf, thresholds]
+
+
+def precision_recall_curve(y_true, scores):
+    """(precision, recall, thresholds), recall increasing, starting at (1, 0)"""
+    thresholds, tps, fps = _threshold_counts(y_true, scores)
+    precision = _safe_divide(tps, tps + fps)
+    recall = _safe_divide(tps, tps[-1] if len(tps) else 0)
+    return np.r_[1.0, precision], np.r_[0.0, recall], np.r_[np.inf, thresholds]
+
+
+def auc(x, y):
+    """Trapezoidal area under a curve given by points sorted along x"""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    return float(np.sum(np.diff(x) * (y[1:] + y[:-1]) / 2.0))
+
+
+def average_precision(y_true, scores):
+    """Step-wise area under the PR curve: sum of ΔR · P"""
+    precision, recall, _ = precision_recall_curve(y_true, scores)
+    return float(np.sum(np.diff(recall) * precision[1:]))
+
+
+def one_vs_rest(labels, probabilities):
+    """
+    ROC / PR curves and their areas for every class against the rest.
+
+    Returns a list (one dict per class) with fpr, tpr, precision, recall,
+    roc_auc and average_precision.
+    """
+    labels = np.asarray(labels)
+    probabilities = np.asarray(probabilities)
+
+    curves = []
+    for class_idx in range(probabilities.shape[1]):
+        positives = labels == class_idx
+        scores = probabilities[:, class_idx]
+        fpr, tpr, _ = roc_curve(positives, scores)
+        precision, recall, _ = precision_recall_curve(positives, scores)
+        curves.append({
+            "fpr": fpr,
+            "tpr": tpr,
+            "precision": precision,
+            "recall": recall,
+            "roc_auc": auc(fpr, tpr),
+            "average_precision": float(np.sum(np.diff(recall) * precision[1:])),
+        })
+    return curves
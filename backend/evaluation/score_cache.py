@@ -0,0 +1,133 @@
+"""
+Cache of per-image evaluation scores
+
+Scores are keyed by a hash of each image file's bytes and stored per model
+fingerprint (checkpoint SHA-256 + backend + precision) as one NumPy array.
+A re-run only scores files whose content is new for the current model.
+
+File hashes are themselves memoised on (path, size, mtime), so unchanged
+files are not even re-read. A 10k-image re-evaluation is then a few stat
+calls plus an array lookup.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+_HASHES_FILE = "file_hashes.npz"
+
+
+def _atomic_savez(path, **arrays):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """BLAKE2b digest of a file's bytes"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ScoreCache:
+    """Probabilities of already-scored images for one model fingerprint"""
+
+    def __init__(self, root, model_fingerprint, num_classes):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.model_fingerprint = model_fingerprint
+
+        name = hashlib.blake2b(model_fingerprint.encode(), digest_size=16).hexdigest()
+        self.scores_path = os.path.join(root, f"scores_{name}.npz")
+        self.hashes_path = os.path.join(root, _HASHES_FILE)
+
+        self._rows = {}
+        self._probabilities = np.zeros((0, num_classes), dtype=np.float32)
+        if os.path.exists(self.scores_path):
+            with np.load(self.scores_path) as data:
+                self._rows = {h: i for i, h in enumerate(data["hashes"].tolist())}
+                self._probabilities = data["probabilities"]
+
+        self._stat_memo = {}
+        if os.path.exists(self.hashes_path):
+            with np.load(self.hashes_path) as data:
+                self._stat_memo = {
+                    path: (int(size), int(mtime), digest)
+                    for path, size, mtime, digest in zip(
+                        data["paths"].tolist(), data["sizes"], data["mtimes"],
+                        data["hashes"].tolist(),
+                    )
+                }
+
+    def __len__(self):
+        return len(self._rows)
+
+    def file_hashes(self, paths):
+        """
+        Content hash of every path, re-reading only new or modified files;
+        None for files that can't be read (they are never cache hits)
+        """
+        hashes = []
+        for path in paths:
+            path = os.path.abspath(path)
+            try:
+                stat = os.stat(path)
+                size, mtime, digest = self._stat_memo.get(path, (None, None, None))
+                if (size, mtime) != (stat.st_size, stat.st_mtime_ns):
+                    digest = file_digest(path)
+                    self._stat_memo[path] = (stat.st_size, stat.st_mtime_ns, digest)
+            except OSError:
+                digest = None
+            hashes.append(digest)
+        return hashes
+
+    def lookup(self, hashes):
+        """
+        Cached rows for hashes as (probabilities [N, C], missing mask);
+        missing rows are NaN.
+        """
+        rows = np.array([self._rows.get(h, -1) for h in hashes], dtype=np.int64)
+        missing = rows < 0
+
+        probabilities = np.full(
+            (len(hashes), self._probabilities.shape[1]), np.nan, dtype=np.float32
+        )
+        probabilities[~missing] = self._probabilities[rows[~missing]]
+        return probabilities, missing
+
+    def update(self, hashes, probabilities):
+        """Add (or replace) the scores of hashes"""
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        if not len(hashes):
+            return
+
+        new = [h for h in dict.fromkeys(hashes) if h not in self._rows]
+        start = len(self._rows)
+        for offset, digest in enumerate(new):
+            self._rows[digest] = start + offset
+        self._probabilities = np.concatenate([
+            self._probabilities,
+            np.zeros((len(new), probabilities.shape[1]), dtype=np.float32),
+        ])
+        self._probabilities[[self._rows[h] for h in hashes]] = probabilities
+
+    def save(self):
+        hashes = sorted(self._rows, key=self._rows.get)
+        _atomic_savez(
+            self.scores_path,
+            hashes=np.array(hashes, dtype="U40"),
+            probabilities=self._probabilities,
+        )
+
+        entries = list(self._stat_memo.values())
+        _atomic_savez(
+            self.hashes_path,
+            paths=np.array(list(self._stat_memo), dtype=str),
+            sizes=np.array([e[0] for e in entries], dtype=np.int64),
+            mtimes=np.array([e[1] for e in entries], dtype=np.int64),
+            hashes=np.array([e[2] for e in entries], dtype="U40"),
+        )
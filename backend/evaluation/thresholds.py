@@ -0,0 +1,202 @@
+"""
+Threshold sweep and confidence operating points
+
+The Prediction page labels each result High / Moderate / Low by its top-1
+probability. The sweep shows what each cut-off would have meant on
+evaluated data: which share of images the model commits to (coverage),
+how often those are right (accuracy), and per-class recall and
+precision. Scores are sorted once; every threshold then reads its counts
+from cumulative sums with one searchsorted. Thousands of thresholds cost
+about as much as one.
+
+choose_operating_points() picks the lowest cut-offs that meet target
+accuracies on enough accepted images. save_operating_points() writes
+them as the confidence configuration that
+utils.confidence_utils.confidence_label reads.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+DEFAULT_THRESHOLDS = np.linspace(0.0, 1.0, 1001)
+
+
+def _counts_at(scores, indicators, thresholds):
+    """
+    Column sums of indicators over rows with score >= t, for every t.
+
+    scores: [N]; indicators: [N, K]; returns [len(thresholds), K].
+    """
+    order = np.argsort(-scores, kind="mergesort")
+    ranked = np.asarray(scores)[order]
+    cumulative = np.vstack([
+        np.zeros((1, indicators.shape[1]), dtype=np.int64),
+        np.cumsum(indicators[order], axis=0, dtype=np.int64),
+    ])
+    # Rows with score >= t are the first N - #(scores < t) of the ranking
+    below = np.searchsorted(ranked[::-1], np.asarray(thresholds), side="left")
+    return cumulative[len(ranked) - below]
+
+
+def _ratio(numerator, denominator, empty=np.nan):
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.full(np.broadcast(numerator, denominator).shape, empty)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def sweep(labels, probabilities, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Metrics of "accept the top-1 prediction when its probability >= t".
+
+    Returns a dict of arrays indexed by threshold:
+      accepted, coverage, accuracy  – overall number and share
+                                      accepted / correct among
+                                      accepted                       [T]
+      recall, precision, coverage_per_class
+                                    – per class (by true class for
+                                      recall and coverage)           [T, C]
+    Accuracy and precision are NaN where nothing is accepted.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    probabilities = np.asarray(probabilities)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    n, num_classes = probabilities.shape
+
+    predictions = probabilities.argmax(axis=1)
+    confidence = probabilities[np.arange(n), predictions]
+    correct = predictions == labels
+
+    eye = np.eye(num_classes, dtype=np.int64)
+    indicators = np.hstack([
+        correct[:, None],          # correct
+        eye[labels],               # true class
+        eye[predictions],          # predicted class
+        eye[labels] * correct[:, None],   # correct, by class
+    ])
+    counts = _counts_at(confidence, indicators, thresholds)
+
+    accepted = counts[:, 1:1 + num_classes].sum(axis=1)
+    by_true = counts[:, 1:1 + num_classes]
+    by_predicted = counts[:, 1 + num_classes:1 + 2 * num_classes]
+    hits = counts[:, 1 + 2 * num_classes:]
+    support = eye[labels].sum(axis=0)
+
+    return {
+        "thresholds": thresholds,
+        "accepted": accepted,
+        "coverage": accepted / max(n, 1),
+        "accuracy": _ratio(counts[:, 0], accepted),
+        "recall": _ratio(hits, support[None, :], empty=0.0),
+        "precision": _ratio(hits, by_predicted),
+        "coverage_per_class": _ratio(by_true, support[None, :], empty=0.0),
+    }
+
+
+def binary_sweep(is_positive, scores, thresholds=DEFAULT_THRESHOLDS):
+    """Recall, precision and flag rate of "positive when score >= t" """
+    is_positive = np.asarray(is_positive, dtype=np.int64)
+    indicators = np.stack([np.ones_like(is_positive), is_positive], axis=1)
+    counts = _counts_at(np.asarray(scores), indicators, thresholds)
+
+    return {
+        "thresholds": np.asarray(thresholds, dtype=np.float64),
+        "recall": _ratio(counts[:, 1], is_positive.sum(), empty=0.0),
+        "precision": _ratio(counts[:, 1], counts[:, 0]),
+        "flag_rate": counts[:, 0] / max(len(is_positive), 1),
+    }
+
+
+# ===============================
+# OPERATING POINTS
+# ===============================
+def _lowest_threshold(result, target, min_coverage, min_accepted):
+    """
+    Smallest t whose accepted predictions are at least target accurate,
+    among thresholds that accept at least min_accepted images and a
+    min_coverage share of them. Returns None when no threshold qualifies.
+
+    Only the accuracy at t itself counts: a few confident mistakes in a
+    small top tail don't rule out every cut-off below them.
+    """
+    accuracy = np.nan_to_num(result["accuracy"], nan=-1.0)
+    qualifies = (
+        (accuracy >= target)
+        & (result["coverage"] >= min_coverage)
+        & (result["accepted"] >= min_accepted)
+    )
+    if not qualifies.any():
+        return None
+    return round(float(result["thresholds"][np.argmax(qualifies)]), 6)
+
+
+def choose_operating_points(result, high_accuracy=0.95, moderate_accuracy=0.85,
+                            min_coverage=0.05, min_accepted=20):
+    """
+    Confidence cut-offs from a sweep() result.
+
+    "high" is the lowest threshold at which accepted predictions are at
+    least high_accuracy correct; "moderate" likewise for
+    moderate_accuracy (never above "high"). Thresholds accepting fewer
+    than min_accepted images or less than min_coverage of the set are
+    too noisy to count. A target no threshold meets gives None for that
+    level.
+    """
+    thresholds = result["thresholds"]
+    high = _lowest_threshold(result, high_accuracy, min_coverage, min_accepted)
+    moderate = _lowest_threshold(result, moderate_accuracy, min_coverage, min_accepted)
+    if high is not None and moderate is not None:
+        moderate = min(moderate, high)
+
+    def point(threshold):
+        if threshold is None:
+            return None
+        i = int(np.searchsorted(thresholds, threshold))
+        return {
+            "threshold": threshold,
+            "coverage": float(result["coverage"][i]),
+            "accuracy": float(result["accuracy"][i]),
+        }
+
+    return {
+        "high": point(high),
+        "moderate": point(moderate),
+        "targets": {"high": high_accuracy, "moderate": moderate_accuracy},
+    }
+
+
+def save_operating_points(points, path, model_fingerprint=None, samples=None):
+    """Write chosen cut-offs as the confidence configuration"""
+    if points["high"] is None or points["moderate"] is None:
+        raise ValueError("Both confidence levels need a threshold to export")
+
+    config = {
+        "high": points["high"]["threshold"],
+        "moderate": points["moderate"]["threshold"],
+        "targets": points["targets"],
+        "expected": {
+            level: {"coverage": points[level]["coverage"], "accuracy": points[level]["accuracy"]}
+            for level in ("high", "moderate")
+        },
+        "model_fingerprint": model_fingerprint,
+        "samples": samples,
+        "created_at": time.time(),
+    }
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(config, f, indent=2)
+    os.replace(tmp_path, path)
+    return config
+
+
+def load_operating_points(path):
+    """Saved confidence configuration, or None"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,157 @@
+"""
+Integrated Gradients and SmoothGrad attributions for SimpleCNN
+"""
+from abc import ABC, abstractmethod
+
+import torch
+
+from backend.gradcam.gradcam import _normalize_cams
+
+
+class _InputGradients(ABC):
+    """
+    Shared machinery: average input gradients of selected logits over many
+    perturbed copies of one image.
+
+    The copies are built chunk by chunk (batch_size at a time) and each
+    chunk takes one forward and one backward pass through the model, so
+    memory is bounded by batch_size however many steps are requested.
+    Gradients are taken only w.r.t. the inputs with torch.autograd.grad,
+    so no parameter .grad is allocated on the shared model.
+    """
+
+    def __init__(self, model, batch_size):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.model = model
+        self.batch_size = batch_size
+
+    @abstractmethod
+    def _perturbed(self, image, start, count):
+        """[count, 3, H, W] inputs number start .. start + count - 1"""
+
+    @abstractmethod
+    def _num_inputs(self):
+        """Number of perturbed inputs averaged per image"""
+
+    @abstractmethod
+    def _attributions(self, image, class_indices):
+        """Per-class [k, 3, H, W] attributions of one [1, 3, H, W] image"""
+
+    def _mean_gradients(self, image, class_indices):
+        """Mean input gradient of each selected logit, as [k, 3, H, W]"""
+        k, total = len(class_indices), self._num_inputs()
+        summed = torch.zeros((k,) + image.shape[1:], device=image.device)
+
+        for start in range(0, total, self.batch_size):
+            count = min(self.batch_size, total - start)
+            with torch.enable_grad():
+                inputs = self._perturbed(image, start, count).requires_grad_()
+                output = self.model(inputs)
+
+                # One-hot selectors, one per class: [k, count, num_classes]
+                grad_outputs = torch.zeros((k,) + output.shape, device=output.device)
+                grad_outputs[torch.arange(k), :, class_indices] = 1.0
+                if k == 1:
+                    (gradients,) = torch.autograd.grad(output, inputs, grad_outputs[0])
+                    gradients = gradients.unsqueeze(0)
+                else:
+                    (gradients,) = torch.autograd.grad(
+                        output, inputs, grad_outputs, is_grads_batched=True
+                    )  # [k, count, 3, H, W]
+
+            summed += gradients.sum(dim=1)
+
+        return summed / total
+
+    def generate(self, input_tensor, class_idx):
+        _, cam, _ = self.forward_and_generate(input_tensor, class_idx)
+        return cam
+
+    def forward_and_generate(self, input_tensor, class_idx=None):
+        logits, class_indices, cams = self.forward_and_generate_many(
+            input_tensor, None if class_idx is None else [class_idx], top_k=1
+        )
+        return logits, cams[0], class_indices[0]
+
+    def forward_and_generate_many(self, input_tensor, class_indices=None, top_k=3):
+        """
+        Attribution maps for several classes of the first image; the
+        gradients of all classes come from the same chunked passes.
+
+        Returns (logits, class_indices, maps) with maps a [k, H, W] array
+        of absolute attributions summed over colour channels.
+        """
+        image = input_tensor[:1]
+        with torch.no_grad():
+            logits = self.model(image)
+        if class_indices is None:
+            top_k = min(top_k, logits.shape[1])
+            class_indices = logits[0].topk(top_k).indices.tolist()
+        class_indices = [int(c) for c in class_indices]
+
+        attributions = self._attributions(image, class_indices)
+        maps = attributions.abs().sum(dim=1)
+        return logits, class_indices, _normalize_cams(maps.detach())
+
+
+class IntegratedGradients(_InputGradients):
+    """
+    Integrated Gradients along the straight path from baseline to input.
+
+    The path integral is approximated with the midpoint rule over `steps`
+    interpolation points, evaluated batch_size at a time. The baseline is
+    0 in normalized space (the dataset mean colour).
+    """
+
+    def __init__(self, model, steps=32, batch_size=16, baseline=0.0):
+        if steps < 1:
+            raise ValueError("steps must be at least 1")
+        super().__init__(model, batch_size)
+        self.steps = steps
+        self.baseline = baseline
+
+    def _num_inputs(self):
+        return self.steps
+
+    def _perturbed(self, image, start, count):
+        alphas = (torch.arange(start, start + count, device=image.device) + 0.5) / self.steps
+        return self.baseline + alphas.view(-1, 1, 1, 1) * (image - self.baseline)
+
+    def _attributions(self, image, class_indices):
+        return (image - self.baseline) * self._mean_gradients(image, class_indices)
+
+
+class SmoothGrad(_InputGradients):
+    """
+    SmoothGrad: input gradients averaged over Gaussian-noised copies.
+
+    noise_level is the noise standard deviation as a fraction of the
+    image's value range. Noise comes from a generator seeded with `seed`,
+    so maps are reproducible and safe to cache.
+    """
+
+    def __init__(self, model, samples=32, noise_level=0.15, batch_size=16, seed=0):
+        if samples < 1:
+            raise ValueError("samples must be at least 1")
+        super().__init__(model, batch_size)
+        self.samples = samples
+        self.noise_level = noise_level
+        self.seed = seed
+
+    def _num_inputs(self):
+        return self.samples
+
+    def _perturbed(self, image, start, count):
+        # One seed per sample, so the maps don't depend on batch_size
+        generator = torch.Generator(device=image.device)
+        noise = torch.empty((count,) + image.shape[1:], device=image.device)
+        for i in range(count):
+            generator.manual_seed(self.seed + start + i)
+            noise[i].normal_(generator=generator)
+
+        sigma = self.noise_level * float(image.max() - image.min())
+        return image + sigma * noise
+
+    def _attributions(self, image, class_indices):
+        return self._mean_gradients(image, class_indices)
@@ -0,0 +1,68 @@
+"""
+Forward-only Class Activation Mapping (CAM) for SimpleCNN
+"""
+import torch
+import torch.nn.functional as F
+
+from backend.gradcam.gradcam import _normalize_cams
+
+
+class CAM:
+    """
+    Exact class activation maps from layer4 activations and fc weights.
+
+    SimpleCNN is ResNet-18 with global average pooling followed by a single
+    Linear(512, num_classes), so logit_c = b_c + mean_hw(Σ_k W[c, k] · A_k).
+    The map Σ_k W[c, k] · A_k is therefore a per-class heatmap that needs
+    no backward pass; after ReLU and normalization it equals Grad-CAM on
+    layer4. The forward pass runs the backbone stages directly under
+    no_grad, so activations come out of the prediction pass itself with no
+    hooks on the shared model.
+
+    Exposes the same forward_and_generate / forward_and_generate_many API
+    as GradCAM, plus a batched forward + generate_from_activations pair.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.backbone = model.backbone
+
+    def forward(self, input_tensor):
+        """Return (logits, layer4 activations) for a batch"""
+        b = self.backbone
+        with torch.no_grad():
+            x = b.maxpool(b.relu(b.bn1(b.conv1(input_tensor))))
+            activations = b.layer4(b.layer3(b.layer2(b.layer1(x))))
+            logits = b.fc(torch.flatten(b.avgpool(activations), 1))
+        return logits, activations
+
+    def generate_from_activations(self, activations, class_indices):
+        """
+        activations: [B, C, H, W]; class_indices: [B, k] class ids.
+        Returns normalized [B, k, H, W] heatmaps as a NumPy array.
+        """
+        class_indices = torch.as_tensor(class_indices, device=activations.device)
+        with torch.no_grad():
+            weights = self.backbone.fc.weight[class_indices]  # [B, k, C]
+            cams = F.relu(torch.einsum("bkc,bchw->bkhw", weights, activations))
+        return _normalize_cams(cams)
+
+    def generate(self, input_tensor, class_idx):
+        _, cam, _ = self.forward_and_generate(input_tensor, class_idx)
+        return cam
+
+    def forward_and_generate(self, input_tensor, class_idx=None):
+        logits, activations = self.forward(input_tensor)
+        if class_idx is None:
+            class_idx = int(logits[0].argmax())
+        cams = self.generate_from_activations(activations[:1], [[class_idx]])
+        return logits, cams[0, 0], class_idx
+
+    def forward_and_generate_many(self, input_tensor, class_indices=None, top_k=3):
+        logits, activations = self.forward(input_tensor)
+        if class_indices is None:
+            top_k = min(top_k, logits.shape[1])
+            class_indices = logits[0].topk(top_k).indices.tolist()
+        class_indices = [int(c) for c in class_indices]
+        cams = self.generate_from_activations(activations[:1], [class_indices])
+        return logits, class_indices, cams[0]
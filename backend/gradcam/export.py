@@ -0,0 +1,185 @@
+"""
+Bulk explanation export for archived images
+
+Streams a directory through batched prediction + explanation and stores
+each raw heatmap, not a rendered overlay, in an archive:
+
+  cams.u8      uint8 [N, H, W] heatmaps (value / 255 = normalized CAM),
+               appended as they arrive and read back with np.memmap
+  probs.f32    float32 [N, num_classes] probabilities
+  index.csv    row, path, prediction, class_idx, confidence
+  meta.json    method, model fingerprint, shapes, class names, failures
+
+A 7 x 7 CAM takes 49 bytes per image. Overlays are rendered on demand
+from the stored map and the original image.
+
+    python -m backend.gradcam.export --image-dir DIR --out DIR [--method cam]
+"""
+import argparse
+import csv
+import json
+import os
+
+import numpy as np
+
+_CAMS_FILE = "cams.u8"
+_PROBS_FILE = "probs.f32"
+_INDEX_FILE = "index.csv"
+_META_FILE = "meta.json"
+
+_INDEX_FIELDS = ("row", "path", "prediction", "class_idx", "confidence")
+
+
+def _quantize(cam):
+    return np.clip(np.rint(np.asarray(cam) * 255.0), 0, 255).astype(np.uint8)
+
+
+# ===============================
+# EXPORT
+# ===============================
+def export_explanations(image_dir, out_dir, method="cam", batch_size=None):
+    """
+    Explain every image below image_dir into an archive in out_dir.
+
+    method must support batched explanation ("cam" or "occlusion"; "cam"
+    equals Grad-CAM on layer4). Files that fail to decode are skipped and
+    listed under "failures" in meta.json. Returns the metadata dict.
+    """
+    from backend.config import (
+        BATCH_SIZE,
+        CLASS_NAMES,
+        DECODE_TARGET_SIZE,
+        MAX_IMAGE_PIXELS,
+        MAX_UPLOAD_BYTES,
+    )
+    from backend.models import model_predictor as predictor
+    from backend.models.image_decoding import ImageDecodeError, decode_image
+    from backend.models.image_folders import list_images
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = list_images(image_dir)
+    exported, failures = [], []
+
+    def images():
+        # Decode lazily so only one batch of images is in memory at a time
+        for path in paths:
+            try:
+                image = decode_image(
+                    path,
+                    target_size=DECODE_TARGET_SIZE,
+                    max_pixels=MAX_IMAGE_PIXELS,
+                    max_bytes=MAX_UPLOAD_BYTES,
+                )
+            except (ImageDecodeError, OSError) as exc:
+                failures.append({"path": path, "error": str(exc)})
+                continue
+            exported.append(path)
+            yield image
+
+    # The archive is the only output: keep the prediction cache and
+    # result store out of it
+    results = predictor.predict_images(
+        images(),
+        batch_size=batch_size or BATCH_SIZE,
+        explain=True,
+        method=method,
+        cache=False,
+    )
+
+    cam_shape = None
+    with open(os.path.join(out_dir, _CAMS_FILE), "wb") as cams_file, \
+            open(os.path.join(out_dir, _PROBS_FILE), "wb") as probs_file, \
+            open(os.path.join(out_dir, _INDEX_FILE), "w", newline="") as index_file:
+        index = csv.writer(index_file)
+        index.writerow(_INDEX_FIELDS)
+
+        for row, result in enumerate(results):
+            cam = _quantize(result["cam"])
+            if cam_shape is None:
+                cam_shape = cam.shape
+            cams_file.write(cam.tobytes())
+
+            probs = np.array(
+                [result["probabilities"][name] for name in CLASS_NAMES], dtype=np.float32
+            )
+            probs_file.write(probs.tobytes())
+
+            index.writerow((
+                row,
+                os.path.relpath(exported[row], image_dir),
+                result["prediction"],
+                result["cam_class"],
+                f"{result['confidence']:.6f}",
+            ))
+
+    meta = {
+        "image_dir": os.path.abspath(image_dir),
+        "method": method,
+        "model_fingerprint": predictor.model_fingerprint(),
+        "count": len(exported),
+        "cam_shape": list(cam_shape or (0, 0)),
+        "class_names": list(CLASS_NAMES),
+        "failures": failures,
+    }
+    with open(os.path.join(out_dir, _META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+# ===============================
+# READING
+# ===============================
+class ExplanationArchive:
+    """Read-only view of an export; heatmaps are memory-mapped, not loaded"""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        with open(os.path.join(out_dir, _META_FILE)) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(out_dir, _INDEX_FILE), newline="") as f:
+            self.index = list(csv.DictReader(f))
+
+        count = self.meta["count"]
+        self.cams = self._memmap(_CAMS_FILE, np.uint8, (count, *self.meta["cam_shape"]))
+        self.probabilities = self._memmap(
+            _PROBS_FILE, np.float32, (count, len(self.meta["class_names"]))
+        )
+
+    def _memmap(self, name, dtype, shape):
+        if shape[0] == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.out_dir, name), dtype=dtype, mode="r", shape=shape)
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def cam(self, row):
+        """Heatmap of one image as float32 in [0, 1]"""
+        return self.cams[row].astype(np.float32) / 255.0
+
+    def render(self, row, width=None, alpha=0.4):
+        """Decode the source image and blend its stored heatmap over it"""
+        from backend.config import DECODE_TARGET_SIZE
+        from backend.gradcam.rendering import render_overlay
+        from backend.models.image_decoding import decode_image
+
+        path = os.path.join(self.meta["image_dir"], self.index[row]["path"])
+        image = decode_image(path, target_size=width or DECODE_TARGET_SIZE)
+        return render_overlay(image, self.cam(row), width=width, alpha=alpha)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--image-dir", required=True, help="Folder of images (recursive)")
+    parser.add_argument("--out", required=True, help="Archive directory to write")
+    parser.add_argument("--method", default="cam", choices=("cam", "occlusion"))
+    parser.add_argument("--batch-size", type=int)
+    args = parser.parse_args(argv)
+
+    meta = export_explanations(args.image_dir, args.out, args.method, args.batch_size)
+    print(f"✅ Exported {meta['count']} heatmaps to {args.out} "
+          f"({len(meta['failures'])} unreadable files skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,215 @@
+import threading
+import weakref
+from contextlib import contextmanager
+
 import torch
 import torch.nn.functional as F
-import numpy as np
-import cv2
-from PIL import Image
 
+from backend.gradcam.rendering import render_overlay
 
-class GradCAM:
-    def __init__(self, model, target_layer):
-        self.model = model
-        self.target_layer = target_layer
-        self.gradients = None
-        self.activations = None
 
-        self._register_hooks()
+class LayerCapture:
+    """
+    Thread-scoped activation capture on one or more layers.
 
-    def _register_hooks(self):
+    Forward hooks are attached only while at least one capture is open
+    and removed as soon as the last one closes. They record outputs only
+    for threads that currently hold a capture, so plain inference on the
+    shared model from other threads is unaffected. Captured tensors live
+    in the per-call dict yielded by capture(), never on the object.
+    """
+
+    def __init__(self, layers):
+        self.layers = list(layers)
+
+        self._local = threading.local()
+        self._hook_lock = threading.Lock()
+        self._hook_handles = []
+        self._active_calls = 0
+
+    def _make_hook(self, index):
         def forward_hook(module, input, output):
-            self.activations = output
+            capture = getattr(self._local, "capture", None)
+            if capture is None:
+                return
+
+            capture["activations"][index] = output
+            if not capture["track_gradients"]:
+                return
+
+            def save_gradient(grad):
+                capture["gradients"][index] = grad
+
+            output.register_hook(save_gradient)
+
+        return forward_hook
+
+    @contextmanager
+    def capture(self, track_gradients=False):
+        """
+        Yield {"activations": [...], "gradients": [...]} for this call,
+        indexed like self.layers. Gradients are only recorded (via tensor
+        hooks) when track_gradients is set.
+        """
+        with self._hook_lock:
+            if self._active_calls == 0:
+                self._hook_handles = [
+                    layer.register_forward_hook(self._make_hook(index))
+                    for index, layer in enumerate(self.layers)
+                ]
+            self._active_calls += 1
+
+        capture = {
+            "track_gradients": track_gradients,
+            "activations": [None] * len(self.layers),
+            "gradients": [None] * len(self.layers),
+        }
+        self._local.capture = capture
+        try:
+            yield capture
+        finally:
+            self._local.capture = None
+            with self._hook_lock:
+                self._active_calls -= 1
+                if self._active_calls == 0:
+                    for handle in self._hook_handles:
+                        handle.remove()
+                    self._hook_handles = []
+
 
-        def backward_hook(module, grad_in, grad_out):
-            self.gradients = grad_out[0]
+class GradCAM:
+    """
+    Grad-CAM bound to a model and target layer, reusable across calls.
 
-        self.target_layer.register_forward_hook(forward_hook)
-        self.target_layer.register_backward_hook(backward_hook)
+    Activations are captured through a LayerCapture, so hooks exist only
+    while an explanation runs and concurrent plain inference is unaffected.
 
-    def generate(self, input_tensor, class_idx):
-        self.model.zero_grad()
+    mode="target" (default) differentiates the class score only w.r.t.
+    the captured activations, so the backward pass stops at target_layer
+    and no parameter .grad is ever allocated. mode="full" runs the
+    classic score.backward() through the whole network.
+    """
+
+    MODES = ("target", "full")
+
+    def __init__(self, model, target_layer, mode="target"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown Grad-CAM mode: {mode!r}")
+
+        self.model = model
+        self.target_layer = target_layer
+        self.mode = mode
+
+        self._layer_capture = LayerCapture([target_layer])
+        self._backward_lock = threading.Lock()
 
-        output = self.model(input_tensor)
-        score = output[:, class_idx]
-        score.backward()
+    def generate(self, input_tensor, class_idx):
+        _, cam, _ = self.forward_and_generate(input_tensor, class_idx)
+        return cam
 
-        weights = self.gradients.mean(dim=(2, 3), keepdim=True)
-        cam = (weights * self.activations).sum(dim=1)
-        cam = F.relu(cam)
+    def forward_and_generate(self, input_tensor, class_idx=None):
+        """
+        Run one forward and one backward pass.
+
+        Returns (logits, cam, class_idx); class_idx defaults to the
+        predicted class, so a prediction and its explanation share a pass.
+        """
+        full = self.mode == "full"
+        with self._layer_capture.capture(track_gradients=full) as capture, \
+                torch.enable_grad():
+            output = self.model(input_tensor)
+            if class_idx is None:
+                class_idx = int(output[0].argmax())
+            score = output[:, class_idx].sum()
+            activations = capture["activations"][0]
+
+            if full:
+                # backward() also accumulates into the shared parameters'
+                # .grad; serialize it with the cleanup so threads don't race
+                with self._backward_lock:
+                    score.backward()
+                    self.model.zero_grad(set_to_none=True)
+                gradients = capture["gradients"][0]
+            else:
+                (gradients,) = torch.autograd.grad(score, activations)
+
+            weights = gradients.mean(dim=(2, 3), keepdim=True)
+            cam = (weights * activations).sum(dim=1)
+            cam = F.relu(cam)
 
         cam = cam[0].detach().cpu().numpy()
         cam -= cam.min()
         cam /= (cam.max() + 1e-8)
 
-        return cam
+        return output.detach(), cam, class_idx
+
+    def forward_and_generate_many(self, input_tensor, class_indices=None, top_k=3):
+        """
+        CAMs for several classes of one image from a single forward pass.
+
+        Gradients of all selected logits w.r.t. the captured activations
+        are computed in one batched (vmapped) backward through the head,
+        so k heatmaps cost far less than k full passes. class_indices
+        defaults to the top_k predicted classes.
+
+        Returns (logits, class_indices, cams) with cams a [k, H, W] array.
+        """
+        with self._layer_capture.capture() as capture, torch.enable_grad():
+            output = self.model(input_tensor)
+            if class_indices is None:
+                top_k = min(top_k, output.shape[1])
+                class_indices = output[0].topk(top_k).indices.tolist()
+            class_indices = [int(c) for c in class_indices]
+
+            activations = capture["activations"][0]
+            scores = output[0, class_indices]
+            (gradients,) = torch.autograd.grad(
+                scores,
+                activations,
+                grad_outputs=torch.eye(len(class_indices), device=scores.device),
+                is_grads_batched=True,
+            )  # [k, 1, C, H, W]
+
+            weights = gradients.mean(dim=(3, 4), keepdim=True)
+            cams = F.relu((weights * activations.unsqueeze(0)).sum(dim=2))[:, 0]
+
+        return output.detach(), class_indices, _normalize_cams(cams.detach())
+
+
+def _normalize_cams(cams):
+    """Scale each trailing [H, W] map of a [..., H, W] tensor to [0, 1]"""
+    flat = cams.flatten(-2)
+    low = flat.min(dim=-1).values[..., None, None]
+    high = flat.max(dim=-1).values[..., None, None]
+    return ((cams - low) / (high - low + 1e-8)).cpu().numpy()
+
+
+_explainers = weakref.WeakKeyDictionary()
+_explainers_lock = threading.Lock()
+
+
+def get_gradcam(model):
+    """Shared GradCAM on model.backbone.layer4, created once per model"""
+    with _explainers_lock:
+        explainer = _explainers.get(model)
+        if explainer is None:
+            explainer = GradCAM(model, model.backbone.layer4)
+            _explainers[model] = explainer
+        return explainer
+
 
+def generate_real_gradcam(model, image_pil, transform, device, class_idx, width=None):
+    from backend.models import model_predictor as predictor
 
-def generate_real_gradcam(model, image_pil, transform, device, class_idx):
-    image_tensor = transform(image_pil).unsqueeze(0).to(device)
+    # Raw 7x7 CAMs are cached, so only the overlay is redone for known images
+    key = predictor._cache_key(predictor._get_preprocessor().to_uint8(image_pil))
+    cam = predictor._heatmap_get(key, "gradcam", class_idx)
 
-    gradcam = GradCAM(model, model.backbone.layer4)
-    cam = gradcam.generate(image_tensor, class_idx)
+    if cam is None:
+        image_tensor = transform(image_pil).unsqueeze(0).to(device)
 
-    cam = cv2.resize(cam, image_pil.size)
-    heatmap = np.uint8(255 * cam)
-    heatmap = cv2.applyColorMap(heatmap, cv2.COLORMAP_JET)
+        cam = get_gradcam(model).generate(image_tensor, class_idx)
 
-    original = np.array(image_pil)
-    overlay = cv2.addWeighted(original, 0.6, heatmap, 0.4, 0)
+        predictor._heatmap_put(key, "gradcam", class_idx, cam)
 
-    return Image.fromarray(overlay)
+    return render_overlay(image_pil, cam, width=width)
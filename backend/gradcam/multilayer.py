@@ -0,0 +1,102 @@
+"""
+Multi-layer Grad-CAM fusion for SimpleCNN
+"""
+import torch
+import torch.nn.functional as F
+
+from backend.gradcam.gradcam import LayerCapture, _normalize_cams
+
+
+class MultiLayerGradCAM:
+    """
+    Grad-CAM on several backbone stages, fused into one heatmap.
+
+    layer4 alone gives a 7x7 map; layer3 (14x14) and layer2 (28x28) keep
+    more spatial detail but are less class-specific. All layers are
+    captured in the same forward pass and their gradients come from one
+    torch.autograd.grad call over the list of activations, so the extra
+    layers add no forward or backward passes. Each per-layer map is
+    normalized, upsampled to the finest resolution and averaged with
+    `weights`, then renormalized.
+
+    Exposes the same forward_and_generate / forward_and_generate_many API
+    as GradCAM.
+    """
+
+    def __init__(self, model, layers=None, weights=None):
+        if layers is None:
+            b = model.backbone
+            layers = [b.layer2, b.layer3, b.layer4]
+        layers = list(layers)
+        if weights is None:
+            weights = [1.0] * len(layers)
+        if len(weights) != len(layers):
+            raise ValueError("weights must have one entry per layer")
+
+        self.model = model
+        self.layers = layers
+        self.weights = [float(w) for w in weights]
+
+        self._layer_capture = LayerCapture(layers)
+
+    def _fuse(self, activations, gradients):
+        """
+        activations[i]: [B, C, H, W]; gradients[i]: [k, B, C, H, W].
+        Returns fused [k, B, H, W] maps at the finest layer resolution.
+        """
+        size = max((a.shape[-2:] for a in activations), key=lambda s: s[0] * s[1])
+        fused = 0
+        for weight, acts, grads in zip(self.weights, activations, gradients):
+            channel_weights = grads.mean(dim=(3, 4), keepdim=True)
+            cams = F.relu((channel_weights * acts.unsqueeze(0)).sum(dim=2))
+
+            flat = cams.flatten(-2)
+            low = flat.min(dim=-1).values[..., None, None]
+            high = flat.max(dim=-1).values[..., None, None]
+            cams = (cams - low) / (high - low + 1e-8)
+
+            if cams.shape[-2:] != size:
+                k, batch = cams.shape[:2]
+                cams = F.interpolate(
+                    cams.flatten(0, 1).unsqueeze(1), size=size,
+                    mode="bilinear", align_corners=False,
+                ).view(k, batch, *size)
+            fused = fused + weight * cams
+        return fused / sum(self.weights)
+
+    def generate(self, input_tensor, class_idx):
+        _, cam, _ = self.forward_and_generate(input_tensor, class_idx)
+        return cam
+
+    def forward_and_generate(self, input_tensor, class_idx=None):
+        """Returns (logits, cam, class_idx) with cam at layer2 resolution"""
+        logits, class_indices, cams = self.forward_and_generate_many(
+            input_tensor, None if class_idx is None else [class_idx], top_k=1
+        )
+        return logits, cams[0], class_indices[0]
+
+    def forward_and_generate_many(self, input_tensor, class_indices=None, top_k=3):
+        """
+        Fused CAMs for several classes of one image from a single forward
+        pass and a single batched backward. Returns (logits, class_indices,
+        cams) with cams a [k, H, W] array.
+        """
+        with self._layer_capture.capture() as capture, torch.enable_grad():
+            output = self.model(input_tensor)
+            if class_indices is None:
+                top_k = min(top_k, output.shape[1])
+                class_indices = output[0].topk(top_k).indices.tolist()
+            class_indices = [int(c) for c in class_indices]
+
+            activations = capture["activations"]
+            scores = output[0, class_indices]
+            gradients = torch.autograd.grad(
+                scores,
+                activations,
+                grad_outputs=torch.eye(len(class_indices), device=scores.device),
+                is_grads_batched=True,
+            )  # one [k, 1, C, H, W] tensor per layer
+
+            cams = self._fuse(activations, gradients)[:, 0]
+
+        return output.detach(), class_indices, _normalize_cams(cams.detach())
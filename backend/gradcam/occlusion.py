@@ -0,0 +1,126 @@
+"""
+Occlusion sensitivity maps for SimpleCNN
+"""
+import torch
+
+from backend.gradcam.gradcam import _normalize_cams
+
+
+class Occlusion:
+    """
+    Occlusion sensitivity: how much a class probability drops when a
+    square patch of the input is replaced by a baseline.
+
+    A patch_size x patch_size window slides over the 224 x 224 input with
+    the given stride, giving one occluded variant per grid position (169
+    for the 32/16 default). Variants are built directly as tensors with
+    no per-patch Python copies and scored in chunks of batch_size through
+    the shared model, so an image costs ceil(169 / batch_size) forward
+    passes. All classes are scored in the same passes, so extra classes
+    are free.
+
+    The baseline is 0 in normalized space, i.e. the dataset mean colour.
+    Maps are on the window grid ([rows, cols]); the renderer upsamples
+    them like any other CAM.
+    """
+
+    def __init__(self, model, patch_size=32, stride=16, batch_size=64, baseline=0.0):
+        if patch_size < 1 or stride < 1 or batch_size < 1:
+            raise ValueError("patch_size, stride and batch_size must be at least 1")
+
+        self.model = model
+        self.patch_size = patch_size
+        self.stride = stride
+        self.batch_size = batch_size
+        self.baseline = baseline
+
+    def _grid(self, height, width):
+        """Top-left corners of every window, as (rows, cols, tops, lefts)"""
+        rows = max(height - self.patch_size, 0) // self.stride + 1
+        cols = max(width - self.patch_size, 0) // self.stride + 1
+        tops = torch.arange(rows).repeat_interleave(cols) * self.stride
+        lefts = torch.arange(cols).repeat(rows) * self.stride
+        return rows, cols, tops, lefts
+
+    def _keep_masks(self, tops, lefts, height, width, device):
+        """[N, 1, H, W] masks that are 0 inside each window and 1 elsewhere"""
+        ys = torch.arange(height, device=device)
+        xs = torch.arange(width, device=device)
+        tops, lefts = tops.to(device), lefts.to(device)
+        in_rows = (ys >= tops[:, None]) & (ys < tops[:, None] + self.patch_size)
+        in_cols = (xs >= lefts[:, None]) & (xs < lefts[:, None] + self.patch_size)
+        inside = in_rows[:, :, None] & in_cols[:, None, :]
+        return (~inside).unsqueeze(1).to(torch.float32)
+
+    def sensitivity(self, input_tensor):
+        """
+        Occlusion probabilities for a batch.
+
+        Returns (logits, drops) where drops is a [B, num_classes, rows,
+        cols] tensor of baseline probability minus occluded probability.
+        """
+        batch, _, height, width = input_tensor.shape
+        rows, cols, tops, lefts = self._grid(height, width)
+        windows = rows * cols
+
+        with torch.no_grad():
+            logits = self.model(input_tensor)
+            base = torch.softmax(logits, dim=1)
+
+            # Flat (image, window) index space, scored batch_size at a time
+            occluded = torch.empty(batch * windows, base.shape[1], device=base.device)
+            for start in range(0, batch * windows, self.batch_size):
+                index = torch.arange(start, min(start + self.batch_size, batch * windows))
+                images, positions = index // windows, index % windows
+
+                keep = self._keep_masks(
+                    tops[positions], lefts[positions], height, width, input_tensor.device
+                )
+                variants = input_tensor[images.to(input_tensor.device)] * keep
+                if self.baseline:
+                    variants += self.baseline * (1.0 - keep)
+
+                occluded[start:start + len(index)] = torch.softmax(self.model(variants), dim=1)
+
+        occluded = occluded.view(batch, rows, cols, -1).permute(0, 3, 1, 2)
+        return logits, base[:, :, None, None] - occluded
+
+    def generate_from_sensitivity(self, drops, class_indices):
+        """
+        drops: [B, num_classes, rows, cols]; class_indices: [B, k] class ids.
+        Returns normalized [B, k, rows, cols] heatmaps as a NumPy array.
+        """
+        class_indices = torch.as_tensor(class_indices, device=drops.device)
+        selected = torch.gather(
+            drops, 1, class_indices[:, :, None, None].expand(-1, -1, *drops.shape[2:])
+        )
+        return _normalize_cams(selected.clamp(min=0))
+
+    def forward_and_generate_batch(self, input_tensor, class_indices=None):
+        """
+        Maps for every image of a batch; class_indices ([B, k]) defaults to
+        each image's predicted class. Returns (logits, [B, k, rows, cols]).
+        """
+        logits, drops = self.sensitivity(input_tensor)
+        if class_indices is None:
+            class_indices = logits.argmax(dim=1, keepdim=True)
+        return logits, self.generate_from_sensitivity(drops, class_indices)
+
+    def generate(self, input_tensor, class_idx):
+        _, cam, _ = self.forward_and_generate(input_tensor, class_idx)
+        return cam
+
+    def forward_and_generate(self, input_tensor, class_idx=None):
+        logits, class_indices, cams = self.forward_and_generate_many(
+            input_tensor, None if class_idx is None else [class_idx], top_k=1
+        )
+        return logits, cams[0], class_indices[0]
+
+    def forward_and_generate_many(self, input_tensor, class_indices=None, top_k=3):
+        logits, drops = self.sensitivity(input_tensor[:1])
+        if class_indices is None:
+            top_k = min(top_k, logits.shape[1])
+            class_indices = logits[0].topk(top_k).indices.tolist()
+        class_indices = [int(c) for c in class_indices]
+        cams = self.generate_from_sensitivity(drops, [class_indices])
+        return logits, class_indices, cams[0]
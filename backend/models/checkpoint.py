@@ -0,0 +1,26 @@
+"""
+Checkpoint fingerprinting for derived model artifacts
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+
+def checkpoint_checksum(path):
+    """
+    SHA-256 of a checkpoint file.
+
+    The digest is memoised on (path, size, mtime) so repeated calls are
+    free until the file is replaced.
+    """
+    stat = os.stat(path)
+    return _checksum(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _checksum(path, size, mtime_ns):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
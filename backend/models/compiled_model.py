@@ -0,0 +1,96 @@
+"""
+TorchScript-frozen SimpleCNN for faster CPU inference
+
+The eager model is traced once with a 224 x 224 example input, frozen
+(conv + batch-norm folding, constant propagation) and saved next to the
+checkpoint. The checkpoint's SHA-256 is stored inside the artifact, so a
+new best_model.pth triggers a rebuild on the next load.
+
+Frozen outputs match the eager model to within TORCHSCRIPT_TOLERANCE
+(absolute difference of softmax probabilities); the only source of
+deviation is float32 rounding from the folded batch-norm weights. Every
+fresh compile is checked against the eager model before it is saved.
+"""
+import os
+
+import torch
+
+from backend.models.checkpoint import checkpoint_checksum
+
+TORCHSCRIPT_TOLERANCE = 1e-4
+
+_CHECKSUM_KEY = "checkpoint_sha256"
+
+
+def _example_input(device):
+    return torch.zeros(1, 3, 224, 224, device=device)
+
+
+def compile_torchscript(eager_model, device="cpu"):
+    """Trace and freeze an eval-mode model"""
+    eager_model.eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(eager_model, _example_input(device))
+    return torch.jit.freeze(traced)
+
+
+def check_parity(eager_model, module, inputs=None, atol=TORCHSCRIPT_TOLERANCE,
+                 device="cpu"):
+    """
+    Compare frozen and eager probabilities on the same inputs.
+
+    inputs defaults to a small batch of random normalised tensors.
+    Returns the max absolute difference and raises ValueError above atol.
+    """
+    if inputs is None:
+        generator = torch.Generator().manual_seed(0)
+        inputs = torch.randn(4, 3, 224, 224, generator=generator)
+    inputs = inputs.to(device)
+
+    with torch.no_grad():
+        expected = torch.softmax(eager_model(inputs), dim=1)
+        actual = torch.softmax(module(inputs), dim=1)
+
+    max_diff = float((expected - actual).abs().max())
+    if max_diff > atol:
+        raise ValueError(
+            f"TorchScript parity check failed: max |Δp| = {max_diff:.2e} > {atol:.0e}"
+        )
+    return max_diff
+
+
+def load_or_compile_torchscript(build_eager_model, checkpoint_path,
+                                artifact_path, device="cpu"):
+    """
+    Return the frozen module for checkpoint_path.
+
+    Loads artifact_path when it was built from the same checkpoint,
+    otherwise calls build_eager_model(), compiles the result, checks
+    parity and rewrites the artifact.
+    """
+    checksum = checkpoint_checksum(checkpoint_path)
+
+    if os.path.exists(artifact_path):
+        extra_files = {_CHECKSUM_KEY: ""}
+        try:
+            module = torch.jit.load(
+                artifact_path, map_location=device, _extra_files=extra_files
+            )
+        except RuntimeError:
+            module = None
+        stored = extra_files[_CHECKSUM_KEY]
+        if isinstance(stored, bytes):
+            stored = stored.decode()
+        if module is not None and stored == checksum:
+            return module
+
+    eager_model = build_eager_model()
+    module = compile_torchscript(eager_model, device)
+    max_diff = check_parity(eager_model, module, device=device)
+
+    tmp_path = f"{artifact_path}.{os.getpid()}.tmp"
+    torch.jit.save(module, tmp_path, _extra_files={_CHECKSUM_KEY: checksum})
+    os.replace(tmp_path, artifact_path)
+    print(f"✅ TorchScript model compiled to {artifact_path} (max |Δp| = {max_diff:.2e})")
+
+    return module
@@ -0,0 +1,92 @@
+"""
+Bounded decoding of uploaded images
+
+The header is read first, so oversized files and decompression bombs are
+rejected before any pixel data is decoded. JPEGs are then decoded in draft
+mode, where libjpeg's DCT scaling (1/2, 1/4, 1/8) yields an image just
+above target_size. Other formats are decoded at full size and then
+reduced by an integer factor. Peak memory and decode time per upload are
+bounded by max_pixels however large the source is.
+"""
+import io
+import warnings
+
+from PIL import Image
+
+
+class ImageDecodeError(ValueError):
+    """Raised for files that are not images or exceed the decode limits"""
+
+
+def _read_source(source, max_bytes):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    elif isinstance(source, str):
+        with open(source, "rb") as f:
+            data = f.read(max_bytes + 1 if max_bytes else -1)
+    elif hasattr(source, "getvalue"):
+        # In-memory uploads (BytesIO, Streamlit UploadedFile) may be re-read
+        # on every rerun, so don't depend on the current stream position
+        data = source.getvalue()
+    else:
+        data = source.read(max_bytes + 1 if max_bytes else -1)
+
+    if max_bytes and len(data) > max_bytes:
+        raise ImageDecodeError(
+            f"Image file is larger than {max_bytes // (1024 * 1024)} MB"
+        )
+    return io.BytesIO(data)
+
+
+def decode_image(source, target_size=None, max_pixels=None, max_bytes=None):
+    """
+    Decode an image to RGB, no larger than needed.
+
+    Args:
+        source: bytes, path or file-like object (e.g. Streamlit upload)
+        target_size (int): smallest side the caller needs; None keeps
+            full resolution
+        max_pixels (int): reject images whose header reports more pixels
+        max_bytes (int): reject files larger than this
+
+    Returns:
+        PIL.Image: RGB image whose shorter side is at least target_size
+        (when the source is that large)
+    """
+    buffer = _read_source(source, max_bytes)
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            image = Image.open(buffer)
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as exc:
+        raise ImageDecodeError(f"Image rejected as a decompression bomb: {exc}") from exc
+    except OSError as exc:
+        raise ImageDecodeError(f"Not a readable image: {exc}") from exc
+
+    width, height = image.size
+    if max_pixels and width * height > max_pixels:
+        raise ImageDecodeError(
+            f"Image is {width}×{height} ({width * height / 1e6:.0f} MP); "
+            f"limit is {max_pixels / 1e6:.0f} MP"
+        )
+
+    # Pillow reports corrupt data as OSError and unsupported modes as
+    # ValueError, at load, convert or reduce time
+    try:
+        if target_size and image.format == "JPEG":
+            image.draft("RGB", (target_size, target_size))
+        image.load()
+
+        # reduce() only supports RGB-like and 8-bit modes (not P, 1, I;16)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        if target_size:
+            factor = min(image.size) // target_size
+            if factor >= 2:
+                image = image.reduce(factor)
+    except (OSError, ValueError) as exc:
+        raise ImageDecodeError(f"Could not decode image: {exc}") from exc
+
+    return image
@@ -0,0 +1,34 @@
+"""
+Image folder listing shared by calibration, evaluation and export tools
+"""
+import os
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def list_images(folder):
+    """Sorted image paths below folder (recursive)"""
+    paths = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def list_labeled_images(folder, class_names):
+    """
+    (path, class_idx) pairs from a folder with one sub-folder per class.
+
+    Sub-folder names are matched to class_names case-insensitively;
+    folders that match no class are skipped.
+    """
+    lookup = {name.lower(): idx for idx, name in enumerate(class_names)}
+    samples = []
+    for entry in sorted(os.listdir(folder)):
+        class_idx = lookup.get(entry.lower())
+        class_dir = os.path.join(folder, entry)
+        if class_idx is None or not os.path.isdir(class_dir):
+            continue
+        samples.extend((path, class_idx) for path in list_images(class_dir))
+    return samples
@@ -0,0 +1,80 @@
+"""
+Inference backends behind predict_image()
+
+Every backend exposes predict_proba(batch), taking a float32
+[B, 3, 224, 224] torch tensor and returning softmax probabilities as a
+[B, num_classes] NumPy array.
+"""
+import os
+
+import numpy as np
+
+
+def _softmax(logits):
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class TorchBackend:
+    """
+    Eager SimpleCNN or a TorchScript module.
+
+    precision "bfloat16" runs the forward pass under CPU autocast;
+    channels_last converts inputs to NHWC to match a model converted with
+    model.to(memory_format=torch.channels_last) at load time.
+    """
+
+    PRECISIONS = ("float32", "bfloat16")
+
+    def __init__(self, model, name="torch", precision="float32", channels_last=False):
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision!r}")
+
+        self.model = model
+        self.name = name
+        self.precision = precision
+        self.channels_last = channels_last
+
+    def predict_proba(self, batch):
+        import torch
+
+        if self.channels_last:
+            batch = batch.contiguous(memory_format=torch.channels_last)
+
+        with torch.no_grad(), torch.autocast(
+            batch.device.type,
+            dtype=torch.bfloat16,
+            enabled=self.precision == "bfloat16",
+        ):
+            logits = self.model(batch)
+
+        return torch.softmax(logits.float(), dim=1).cpu().numpy()
+
+
+class OnnxRuntimeBackend:
+    """ONNX Runtime CPU session with full graph optimisations"""
+
+    name = "onnx"
+
+    def __init__(self, onnx_path, intra_op_threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+
+        self.session = ort.InferenceSession(
+            onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict_proba(self, batch):
+        inputs = np.ascontiguousarray(batch.cpu().numpy(), dtype=np.float32)
+        logits = self.session.run(None, {self.input_name: inputs})[0]
+        return _softmax(logits)
+
+
+def onnx_threads(max_concurrency):
+    """Intra-op threads per session slot, matching ModelHolder's torch split"""
+    return max(1, (os.cpu_count() or 1) // max_concurrency)
@@ -0,0 +1,68 @@
+"""
+Process-wide model instance shared by all Streamlit sessions
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+
+class ModelHolder:
+    """
+    Load a model exactly once and bound concurrent use of it.
+
+    get() performs the load under a lock on first use; later calls return
+    the cached instance. acquire() is a context manager that additionally
+    takes one of max_concurrency slots for the duration of a forward pass.
+    Torch intra-op threads are split across those slots so that concurrent
+    sessions do not oversubscribe the CPU cores.
+
+    Holders that run on the same underlying model can pass one holder's
+    slots to the other so both count against a single limit.
+    """
+
+    def __init__(self, loader, max_concurrency=1, slots=None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self._loader = loader
+        self.max_concurrency = max_concurrency
+
+        self._model = None
+        self._load_lock = threading.Lock()
+        self.slots = slots or threading.BoundedSemaphore(max_concurrency)
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def get(self):
+        """Return the shared model, loading it on first call"""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._configure_threads()
+                    self._model = self._loader()
+        return self._model
+
+    @contextmanager
+    def acquire(self):
+        """Hold one concurrency slot and yield the shared model"""
+        model = self.get()
+        with self.slots:
+            yield model
+
+    def reset(self):
+        """Drop the cached model so the next get() reloads it"""
+        with self._load_lock:
+            self._model = None
+
+    def _configure_threads(self):
+        import torch
+
+        threads = max(1, (os.cpu_count() or 1) // self.max_concurrency)
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(min(self.max_concurrency, threads))
+        except RuntimeError:
+            # Only allowed before the first parallel op in the process
+            pass
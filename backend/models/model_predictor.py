@@ -1,8 +1,49 @@
 # backend/inference.py
+import threading
+
 from PIL import Image
 import numpy as np
 
-from backend.config import CLASS_NAMES, MODEL_PATH
+from backend.config import (
+    CLASS_NAMES,
+    MODEL_PATH,
+    BATCH_SIZE,
+    MICRO_BATCHING,
+    MICRO_BATCH_MAX_SIZE,
+    MICRO_BATCH_MAX_WAIT_MS,
+    MODEL_CONCURRENCY,
+    INFERENCE_BACKEND,
+    TORCHSCRIPT_PATH,
+    ONNX_PATH,
+    QUANTIZED_MODEL_PATH,
+    QUANTIZATION_ENGINE,
+    INFERENCE_PRECISION,
+    CHANNELS_LAST,
+    PREDICTION_CACHE,
+    PREDICTION_CACHE_MAX_ENTRIES,
+    PREDICTION_CACHE_MAX_BYTES,
+    RESULT_STORE,
+    RESULT_STORE_DIR,
+    EXPLAINER,
+    OCCLUSION_PATCH_SIZE,
+    OCCLUSION_STRIDE,
+    OCCLUSION_BATCH_SIZE,
+    INTEGRATED_GRADIENTS_STEPS,
+    SMOOTHGRAD_SAMPLES,
+    SMOOTHGRAD_NOISE_LEVEL,
+    SMOOTHGRAD_SEED,
+    ATTRIBUTION_BATCH_SIZE,
+)
+from backend.models.batch_scheduler import MicroBatchScheduler
+from backend.models.model_holder import ModelHolder
+from backend.models.checkpoint import checkpoint_checksum
+from backend.models.prediction_cache import PredictionCache, image_digest
+from backend.models.result_store import ResultStore
+from backend.models.inference_backends import (
+    TorchBackend,
+    OnnxRuntimeBackend,
+    onnx_threads,
+)
 
 # Lazy imports - only load when needed
 torch = None
@@ -16,7 +57,6 @@ def _init_torch():
         from torchvision import transforms as transforms_lib
         from backend.models.model_architecture import SimpleCNN as SimpleCNN_lib
 
-        torch_lib.set_grad_enabled(False)
         torch_lib.backends.cudnn.deterministic = True
         torch_lib.backends.cudnn.benchmark = False
 
@@ -31,30 +71,96 @@ def _get_device():
 # ===============================
 # MODEL CACHING
 # ===============================
-_model = None
+def _build_model():
+    _init_torch()
+    device = _get_device()
+    model = SimpleCNN(num_classes=len(CLASS_NAMES)).to(device)
+    model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
+    model.eval()
+    if CHANNELS_LAST:
+        model = model.to(memory_format=torch.channels_last)
+    print(f"✅ Model loaded successfully on {device}")
+    return model
 
-def _load_model():
-    global _model
-    if _model is None:
+def _build_backend():
+    """Backend selected by INFERENCE_BACKEND, wrapping its model or session"""
+    if INFERENCE_BACKEND == "torch":
+        return TorchBackend(
+            _load_model(),
+            precision=INFERENCE_PRECISION,
+            channels_last=CHANNELS_LAST,
+        )
+
+    if INFERENCE_BACKEND == "torchscript":
+        _init_torch()
+        from backend.models.compiled_model import load_or_compile_torchscript
+
+        module = load_or_compile_torchscript(
+            _build_model, MODEL_PATH, TORCHSCRIPT_PATH, device=_get_device()
+        )
+        return TorchBackend(
+            module,
+            name="torchscript",
+            precision=INFERENCE_PRECISION,
+            channels_last=CHANNELS_LAST,
+        )
+
+    if INFERENCE_BACKEND == "onnx":
+        from backend.models.onnx_export import load_or_export_onnx
+
+        load_or_export_onnx(_build_model, MODEL_PATH, ONNX_PATH)
+        return OnnxRuntimeBackend(
+            ONNX_PATH, intra_op_threads=onnx_threads(MODEL_CONCURRENCY)
+        )
+
+    if INFERENCE_BACKEND == "int8":
         _init_torch()
-        device = _get_device()
-        model = SimpleCNN(num_classes=len(CLASS_NAMES)).to(device)
-        model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
-        model.eval()
-        _model = model
-        print(f"✅ Model loaded successfully on {device}")
-    return _model
+        from backend.models.quantization import load_quantized
+
+        module = load_quantized(QUANTIZED_MODEL_PATH, MODEL_PATH, QUANTIZATION_ENGINE)
+        return TorchBackend(module, name="int8")
+
+    raise ValueError(f"Unknown INFERENCE_BACKEND: {INFERENCE_BACKEND!r}")
+
+# Eager model (Grad-CAM, anything needing module attributes) and the
+# backend predictions run on; both share one SimpleCNN for "torch", and
+# the intra-op thread split assumes MODEL_CONCURRENCY passes in total, so
+# they share one set of concurrency slots
+_eager_holder = ModelHolder(_build_model, max_concurrency=MODEL_CONCURRENCY)
+_holder = ModelHolder(
+    _build_backend, max_concurrency=MODEL_CONCURRENCY, slots=_eager_holder.slots
+)
+
+def _load_model():
+    return _eager_holder.get()
+
+_transform = None
+_preprocessor = None
 
 def _get_transform():
+    """torchvision pipeline, kept for Grad-CAM and export/calibration tools"""
+    global _transform
     _init_torch()
-    return transforms.Compose([
-        transforms.Resize((224, 224)),
-        transforms.ToTensor(),
-        transforms.Normalize(
-            mean=[0.485, 0.456, 0.406],
-            std=[0.229, 0.224, 0.225],
-        ),
-    ])
+    if _transform is None:
+        _transform = transforms.Compose([
+            transforms.Resize((224, 224)),
+            transforms.ToTensor(),
+            transforms.Normalize(
+                mean=[0.485, 0.456, 0.406],
+                std=[0.229, 0.224, 0.225],
+            ),
+        ])
+    return _transform
+
+def _get_preprocessor():
+    """Shared Preprocessor used by the prediction paths"""
+    global _preprocessor
+    _init_torch()
+    if _preprocessor is None:
+        from backend.models.preprocessing import Preprocessor
+
+        _preprocessor = Preprocessor(batch_capacity=max(BATCH_SIZE, MICRO_BATCH_MAX_SIZE))
+    return _preprocessor
 
 # ===============================
 # PREDICTION FUNCTION (SAME AS COLAB)
@@ -63,31 +169,427 @@ def predict_image(pil_image: Image.Image):
     """
     Run inference exactly like Colab single-image prediction
     """
-    _init_torch()
-    
-    model = _load_model()
-    device = _get_device()
-    transform = _get_transform()
-
     # Preprocess
-    image = pil_image.convert("RGB")
-    tensor = transform(image).unsqueeze(0).to(device)  # [1, 3, 224, 224]
+    pixels = _get_preprocessor().to_uint8(pil_image)  # [224, 224, 3] uint8
+
+    key = _cache_key(pixels)
+    probs_np = _cache_get(key)
+    if probs_np is not None:
+        return _format_result(probs_np)
 
     # Inference
-    with torch.no_grad():
-        outputs = model(tensor)
-        probs = torch.softmax(outputs, dim=1)
-        conf, pred = torch.max(probs, dim=1)
+    if MICRO_BATCHING:
+        probs_np = _get_scheduler().submit(pixels).result()
+    else:
+        probs_np = _forward_probs([pixels])[0]
 
-    pred_idx = pred.item()
-    confidence = conf.item()
-    probs_np = probs[0].cpu().numpy()
+    _cache_put(key, probs_np)
+    return _format_result(probs_np)
+
+
+def _format_result(probs_np):
+    """Build the result dict shared by predict_image() and predict_images()"""
+    pred_idx = int(np.argmax(probs_np))
 
     return {
         "prediction": CLASS_NAMES[pred_idx],
-        "confidence": confidence,  # 0–1 (multiply by 100 in UI if needed)
+        "confidence": float(probs_np[pred_idx]),  # 0–1 (multiply by 100 in UI if needed)
         "probabilities": {
             CLASS_NAMES[i]: float(probs_np[i])
             for i in range(len(CLASS_NAMES))
         },
     }
+
+# ===============================
+# PREDICTION + GRAD-CAM (ONE PASS)
+# ===============================
+def predict_and_explain(pil_image: Image.Image, class_idx=None, top_k=1, method=None):
+    """
+    Prediction and Grad-CAM from a single forward pass.
+
+    method picks the explainer ("gradcam", the forward-only "cam",
+    "gradcam_multilayer", "occlusion", "integrated_gradients" or
+    "smoothgrad"); it defaults to EXPLAINER from the config.
+
+    Returns the predict_image() dict plus "cam" (normalized NumPy
+    heatmap) and "cam_class" (index it explains; defaults to the
+    predicted class). The heatmap's shape depends on the method:
+      "gradcam", "cam"          – 7 x 7 (layer4 grid)
+      "gradcam_multilayer"      – 28 x 28 (layer2 grid)
+      "occlusion"               – one cell per patch position, 13 x 13
+                                  with the default OCCLUSION_PATCH_SIZE
+                                  and OCCLUSION_STRIDE
+      "integrated_gradients",
+      "smoothgrad"              – 224 x 224 (input pixels)
+    With top_k > 1 and no class_idx, "cams" maps each of the top_k class
+    names to its heatmap, all from the same pass. Cached results skip the
+    model entirely.
+    """
+    _init_torch()
+
+    method = method or EXPLAINER
+    pixels = _get_preprocessor().to_uint8(pil_image)
+    key = _cache_key(pixels)
+
+    probs_np = _cache_get(key)
+    if probs_np is not None:
+        targets = _cam_targets(probs_np, class_idx, top_k)
+        cams = [_heatmap_get(key, method, target) for target in targets]
+        if all(cam is not None for cam in cams):
+            return _explained_result(probs_np, targets, cams)
+
+    batch = _get_preprocessor().normalize([pixels]).to(_get_device())
+    with _eager_holder.acquire() as model:
+        explainer = _get_explainer(model, method)
+        if class_idx is None and top_k > 1:
+            logits, targets, cams = explainer.forward_and_generate_many(batch, top_k=top_k)
+        else:
+            logits, cam, target = explainer.forward_and_generate(batch, class_idx)
+            targets, cams = [target], [cam]
+
+    probs_np = torch.softmax(logits, dim=1)[0].cpu().numpy()
+
+    if _eager_matches_backend():
+        _cache_put(key, probs_np)
+    for target, cam in zip(targets, cams):
+        _heatmap_put(key, method, target, cam)
+
+    return _explained_result(probs_np, targets, cams)
+
+def _get_explainer(model, method):
+    if method == "gradcam":
+        from backend.gradcam.gradcam import get_gradcam
+
+        return get_gradcam(model)
+    if method == "cam":
+        from backend.gradcam.cam import CAM
+
+        return CAM(model)
+    if method == "gradcam_multilayer":
+        from backend.gradcam.multilayer import MultiLayerGradCAM
+
+        return MultiLayerGradCAM(model)
+    if method == "occlusion":
+        from backend.gradcam.occlusion import Occlusion
+
+        return Occlusion(
+            model,
+            patch_size=OCCLUSION_PATCH_SIZE,
+            stride=OCCLUSION_STRIDE,
+            batch_size=OCCLUSION_BATCH_SIZE,
+        )
+    if method == "integrated_gradients":
+        from backend.gradcam.attribution import IntegratedGradients
+
+        return IntegratedGradients(
+            model,
+            steps=INTEGRATED_GRADIENTS_STEPS,
+            batch_size=ATTRIBUTION_BATCH_SIZE,
+        )
+    if method == "smoothgrad":
+        from backend.gradcam.attribution import SmoothGrad
+
+        return SmoothGrad(
+            model,
+            samples=SMOOTHGRAD_SAMPLES,
+            noise_level=SMOOTHGRAD_NOISE_LEVEL,
+            batch_size=ATTRIBUTION_BATCH_SIZE,
+            seed=SMOOTHGRAD_SEED,
+        )
+    raise ValueError(f"Unknown explainer: {method!r}")
+
+def _eager_matches_backend():
+    """
+    Eager FP32 probabilities only stand in for the serving backend's
+    output (and may be cached under its fingerprint) when that backend
+    is eager FP32 too
+    """
+    return INFERENCE_BACKEND == "torch" and INFERENCE_PRECISION == "float32"
+
+def _cam_targets(probs_np, class_idx, top_k):
+    if class_idx is not None:
+        return [class_idx]
+    return [int(i) for i in np.argsort(-probs_np)[:max(top_k, 1)]]
+
+def _explained_result(probs_np, targets, cams):
+    result = _format_result(probs_np)
+    result["cam"] = cams[0]
+    result["cam_class"] = targets[0]
+    if len(targets) > 1:
+        result["cams"] = {
+            CLASS_NAMES[target]: cam for target, cam in zip(targets, cams)
+        }
+    return result
+
+# ===============================
+# BATCHED PREDICTION
+# ===============================
+def _forward_probs(pixel_arrays):
+    """Normalize uint8 arrays as one batch and return softmax rows as NumPy"""
+    batch = _get_preprocessor().normalize(pixel_arrays)  # [B, 3, 224, 224]
+    batch = batch.to(_get_device())
+
+    with _holder.acquire() as backend:
+        return backend.predict_proba(batch)
+
+BATCH_EXPLAINERS = ("cam", "occlusion")
+
+def _forward_probs_and_cams(pixel_arrays, method="cam"):
+    """Eager batched pass returning probabilities and the predicted-class maps"""
+    if method not in BATCH_EXPLAINERS:
+        raise ValueError(
+            f"Batched explanations support {BATCH_EXPLAINERS}, not {method!r}"
+        )
+
+    batch = _get_preprocessor().normalize(pixel_arrays).to(_get_device())
+    with _eager_holder.acquire() as model:
+        explainer = _get_explainer(model, method)
+        if method == "cam":
+            logits, activations = explainer.forward(batch)
+            targets = logits.argmax(dim=1, keepdim=True)
+            cams = explainer.generate_from_activations(activations, targets)
+        else:
+            logits, cams = explainer.forward_and_generate_batch(batch)
+
+    return torch.softmax(logits, dim=1).cpu().numpy(), cams[:, 0]
+
+def _predict_batch(pending, explain=False, method="cam"):
+    """
+    Score the uncached entries of [(key, pixels, cached_probs, cached_cam)]
+    in one pass
+    """
+    arrays = [entry[1] for entry in pending if entry[2] is None]
+    if not arrays:
+        rows, cams = iter(()), iter(())
+    elif explain:
+        probs_np, cams_np = _forward_probs_and_cams(arrays, method)
+        rows, cams = iter(probs_np), iter(cams_np)
+    else:
+        rows, cams = iter(_forward_probs(arrays)), iter(())
+
+    results, computed = [], []
+    for key, _, cached, cam in pending:
+        if cached is None:
+            cached = next(rows)
+            if explain:
+                cam = next(cams)
+                _heatmap_put(key, method, int(np.argmax(cached)), cam)
+                if _eager_matches_backend():
+                    computed.append((key, cached))
+            else:
+                computed.append((key, cached))
+
+        if explain:
+            results.append(_explained_result(cached, [int(np.argmax(cached))], [cam]))
+        else:
+            results.append(_format_result(cached))
+
+    _cache_put_many(computed)
+    return results
+
+def predict_images(images, batch_size=BATCH_SIZE, explain=False, method="cam",
+                   cache=True):
+    """
+    Run inference on an iterable of PIL images, one forward pass per batch.
+
+    Yields one result dict per image, in input order, with the same keys
+    as predict_image(). With explain=True every result also carries a
+    heatmap of its predicted class ("cam", "cam_class"). method is one of
+    BATCH_EXPLAINERS: "cam" (default) reuses the activations of the same
+    eager forward pass; "occlusion" scores the occluded variants of the
+    whole batch in shared chunks.
+
+    cache=False bypasses the prediction cache and result store entirely
+    (no lookups, no writes), so bulk jobs neither persist every result
+    nor evict the live entries.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if explain and method not in BATCH_EXPLAINERS:
+        raise ValueError(
+            f"Batched explanations support {BATCH_EXPLAINERS}, not {method!r}"
+        )
+
+    preprocessor = _get_preprocessor()
+
+    # Cache hits ride along with the next batch so results stay in order;
+    # a batch is flushed once it holds batch_size entries, hits or misses
+    pending = []
+    for image in images:
+        pixels = preprocessor.to_uint8(image)
+        key = _cache_key(pixels) if cache else None
+        cached = _cache_get(key)
+        cam = None
+        if cached is not None and explain:
+            cam = _heatmap_get(key, method, int(np.argmax(cached)))
+            if cam is None:
+                cached = None
+
+        if cached is None:
+            pending.append((key, pixels, None, None))
+        else:
+            pending.append((key, None, cached, cam))
+
+        if len(pending) == batch_size:
+            yield from _predict_batch(pending, explain, method)
+            pending = []
+
+    if pending:
+        yield from _predict_batch(pending, explain, method)
+
+# ===============================
+# PREDICTION CACHE
+# ===============================
+_cache = PredictionCache(
+    max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+    max_bytes=PREDICTION_CACHE_MAX_BYTES,
+)
+
+def model_fingerprint():
+    """Identifies the weights and execution mode that produced a prediction"""
+    return ":".join([
+        checkpoint_checksum(MODEL_PATH),
+        INFERENCE_BACKEND,
+        INFERENCE_PRECISION,
+    ])
+
+def _cache_key(pixels):
+    """Key on the resized model input, which fully determines the output"""
+    if not (PREDICTION_CACHE or RESULT_STORE):
+        return None
+    return (image_digest(pixels), model_fingerprint())
+
+def _cache_get(key):
+    """Look up probabilities in memory, then in the persistent store"""
+    if key is None:
+        return None
+
+    if PREDICTION_CACHE:
+        probs_np = _cache.get(key)
+        if probs_np is not None:
+            return probs_np
+
+    store = get_result_store()
+    if store is None:
+        return None
+    probs_np = store.get_probabilities(*key)
+    if probs_np is not None and PREDICTION_CACHE:
+        _cache.put(key, probs_np)
+    return probs_np
+
+def _cache_put(key, probs_np):
+    _cache_put_many([(key, probs_np)])
+
+def _cache_put_many(items):
+    items = [(key, probs_np) for key, probs_np in items if key is not None]
+    if not items:
+        return
+
+    if PREDICTION_CACHE:
+        for key, probs_np in items:
+            _cache.put(key, probs_np)
+
+    store = get_result_store()
+    if store is not None:
+        store.put_probabilities(
+            (image_hash, fingerprint, probs_np)
+            for (image_hash, fingerprint), probs_np in items
+        )
+
+def _heatmap_method(method):
+    """
+    method plus the explainer settings its maps depend on, so maps made
+    with other settings are never served from the cache or store
+    """
+    if method == "occlusion":
+        return f"occlusion:p{OCCLUSION_PATCH_SIZE}:s{OCCLUSION_STRIDE}"
+    if method == "integrated_gradients":
+        return f"integrated_gradients:n{INTEGRATED_GRADIENTS_STEPS}"
+    if method == "smoothgrad":
+        return (
+            f"smoothgrad:n{SMOOTHGRAD_SAMPLES}:"
+            f"sigma{SMOOTHGRAD_NOISE_LEVEL}:seed{SMOOTHGRAD_SEED}"
+        )
+    return method
+
+def _heatmap_get(key, method, class_idx):
+    """Cached raw heatmap for (image, model, method, class), or None"""
+    if key is None:
+        return None
+
+    method = _heatmap_method(method)
+    heatmap_key = key + (method, int(class_idx))
+    if PREDICTION_CACHE:
+        cam = _cache.get(heatmap_key)
+        if cam is not None:
+            return cam
+
+    store = get_result_store()
+    if store is None:
+        return None
+    cam = store.get_heatmap(*key, method, class_idx)
+    if cam is not None and PREDICTION_CACHE:
+        _cache.put(heatmap_key, cam)
+    return cam
+
+def _heatmap_put(key, method, class_idx, cam):
+    if key is None:
+        return
+    method = _heatmap_method(method)
+    if PREDICTION_CACHE:
+        _cache.put(key + (method, int(class_idx)), cam)
+    store = get_result_store()
+    if store is not None:
+        store.put_heatmap(*key, method, class_idx, cam)
+
+def prediction_cache_stats():
+    """Hit/miss counters and current size of the shared prediction cache"""
+    return _cache.stats()
+
+# ===============================
+# PERSISTENT RESULT STORE
+# ===============================
+_store = None
+_store_lock = threading.Lock()
+
+def get_result_store():
+    """Shared ResultStore (created and used to warm the cache on first call)"""
+    global _store
+    if not RESULT_STORE:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = ResultStore(RESULT_STORE_DIR)
+                if PREDICTION_CACHE:
+                    warm_prediction_cache(store)
+                _store = store
+    return _store
+
+def warm_prediction_cache(store, limit=PREDICTION_CACHE_MAX_ENTRIES):
+    """Load the most recent stored predictions for the current model into memory"""
+    fingerprint = model_fingerprint()
+    rows = list(store.iter_probabilities(fingerprint, limit=limit))
+
+    # Oldest first, so the most recent rows end up most recently used
+    for image_hash, probs_np in reversed(rows):
+        _cache.put((image_hash, fingerprint), probs_np)
+    return len(rows)
+
+# ===============================
+# CROSS-SESSION MICRO-BATCHING
+# ===============================
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def _get_scheduler():
+    """Shared scheduler that merges concurrent predict_image() calls"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = MicroBatchScheduler(
+                _forward_probs,
+                max_batch_size=MICRO_BATCH_MAX_SIZE,
+                max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+            )
+    return _scheduler
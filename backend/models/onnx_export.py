@@ -0,0 +1,167 @@
+"""
+Export best_model.pth to ONNX and check parity with PyTorch
+
+The checkpoint checksum an export was built from is kept in a small
+sidecar file (<onnx_path>.sha256), so a cold start can check it without
+parsing the model.
+
+Run directly to (re)build the artifact and print the parity report:
+
+    python -m backend.models.onnx_export
+"""
+import os
+import tempfile
+
+import numpy as np
+import torch
+
+from backend.models.checkpoint import checkpoint_checksum
+
+# Max absolute difference of softmax probabilities vs. eager PyTorch
+ONNX_TOLERANCE = 1e-4
+
+_CHECKSUM_KEY = "checkpoint_sha256"
+
+
+def export_onnx(eager_model, onnx_path, checksum=None):
+    """Export an eval-mode model with a dynamic batch dimension"""
+    import onnx
+
+    eager_model.eval()
+
+    # Newer exporters may write weights to a side file next to the output;
+    # export into a scratch dir and re-save as one self-contained model
+    with tempfile.TemporaryDirectory() as scratch:
+        scratch_path = os.path.join(scratch, "model.onnx")
+        torch.onnx.export(
+            eager_model,
+            (torch.zeros(1, 3, 224, 224),),
+            scratch_path,
+            input_names=["input"],
+            output_names=["logits"],
+            dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        )
+        proto = onnx.load(scratch_path)
+
+    if checksum is not None:
+        onnx.helper.set_model_props(proto, {_CHECKSUM_KEY: checksum})
+
+    tmp_path = f"{onnx_path}.{os.getpid()}.tmp"
+    onnx.save(proto, tmp_path)
+    os.replace(tmp_path, onnx_path)
+
+
+def _checksum_path(onnx_path):
+    return f"{onnx_path}.sha256"
+
+
+def stored_checksum(onnx_path):
+    """Checkpoint checksum recorded next to an exported model, or None"""
+    try:
+        with open(_checksum_path(onnx_path)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _write_checksum(onnx_path, checksum):
+    path = _checksum_path(onnx_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(checksum)
+    os.replace(tmp_path, path)
+
+
+def check_parity(eager_model, onnx_path, inputs=None, atol=ONNX_TOLERANCE):
+    """
+    Compare ONNX Runtime and PyTorch probabilities on the same inputs.
+
+    inputs defaults to a small batch of random normalised tensors.
+    Returns the max absolute difference and raises ValueError above atol.
+    """
+    from backend.models.inference_backends import OnnxRuntimeBackend, TorchBackend
+
+    if inputs is None:
+        generator = torch.Generator().manual_seed(0)
+        inputs = torch.randn(4, 3, 224, 224, generator=generator)
+
+    expected = TorchBackend(eager_model).predict_proba(inputs)
+    actual = OnnxRuntimeBackend(onnx_path).predict_proba(inputs)
+
+    max_diff = float(np.abs(expected - actual).max())
+    if max_diff > atol:
+        raise ValueError(
+            f"ONNX parity check failed: max |Δp| = {max_diff:.2e} > {atol:.0e}"
+        )
+    return max_diff
+
+
+def load_or_export_onnx(build_eager_model, checkpoint_path, onnx_path):
+    """
+    Make sure onnx_path holds an export of checkpoint_path.
+
+    Re-exports (and re-checks parity) when the artifact is missing or was
+    built from a different checkpoint. Returns onnx_path.
+    """
+    checksum = checkpoint_checksum(checkpoint_path)
+
+    if os.path.exists(onnx_path) and stored_checksum(onnx_path) == checksum:
+        return onnx_path
+
+    max_diff = export_checked(build_eager_model(), onnx_path, checksum)
+    print(f"✅ ONNX model exported to {onnx_path} (max |Δp| = {max_diff:.2e})")
+
+    return onnx_path
+
+
+def export_checked(eager_model, onnx_path, checksum=None, inputs=None):
+    """
+    Export to a staging file and move it to onnx_path only once it passes
+    check_parity(), so a failed export is never served. Returns the max
+    absolute difference.
+    """
+    staging_path = f"{onnx_path}.{os.getpid()}.staging.onnx"
+    try:
+        export_onnx(eager_model, staging_path, checksum)
+        max_diff = check_parity(eager_model, staging_path, inputs)
+        os.replace(staging_path, onnx_path)
+        if checksum is not None:
+            # Written last: a stale or missing sidecar only forces a re-export
+            _write_checksum(onnx_path, checksum)
+    finally:
+        if os.path.exists(staging_path):
+            os.remove(staging_path)
+    return max_diff
+
+
+def _sample_inputs():
+    from PIL import Image
+
+    from backend.models.model_predictor import _get_transform
+
+    sample_dir = os.path.join(
+        os.path.dirname(__file__), "..", "..", "assets", "sample_images"
+    )
+    if not os.path.isdir(sample_dir):
+        return None
+
+    transform = _get_transform()
+    tensors = []
+    for name in sorted(os.listdir(sample_dir)):
+        if name.lower().endswith((".png", ".jpg", ".jpeg")):
+            with Image.open(os.path.join(sample_dir, name)) as image:
+                tensors.append(transform(image.convert("RGB")))
+
+    return torch.stack(tensors) if tensors else None
+
+
+if __name__ == "__main__":
+    from backend.config import MODEL_PATH, ONNX_PATH
+    from backend.models.model_predictor import _build_model
+
+    model = _build_model()
+    inputs = _sample_inputs()
+    source = "sample images" if inputs is not None else "random inputs"
+    max_diff = export_checked(model, ONNX_PATH, checkpoint_checksum(MODEL_PATH), inputs)
+    print(f"✅ Exported {ONNX_PATH}")
+    print(f"Parity on {source}: max |Δp| = {max_diff:.2e} (tolerance {ONNX_TOLERANCE:.0e})")
@@ -0,0 +1,115 @@
+"""
+In-process LRU cache for predictions and explanations
+
+Entries are keyed by the hash of the decoded pixel data plus a model
+fingerprint, so the same image re-uploaded from any session (or a rerun)
+is served without a forward pass, and a new checkpoint never returns
+stale results.
+"""
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def image_digest(image):
+    """BLAKE2b digest of decoded pixels (PIL image or NumPy array)"""
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(image, np.ndarray):
+        image = np.ascontiguousarray(image)
+        digest.update(f"{image.dtype}:{image.shape}:".encode())
+        digest.update(image.data)
+    else:
+        digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+        digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def _estimate_nbytes(value):
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU mapping with an entry budget and an optional byte budget.
+
+    The least recently used entries are evicted once either max_entries or
+    max_bytes is exceeded. hits, misses and evictions are counted for
+    monitoring.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()   # key -> (value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached value (marking it recently used) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        """Store value under key, evicting least recently used entries"""
+        if nbytes is None:
+            nbytes = _estimate_nbytes(value)
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,63 @@
+"""
+Preprocessing from uploaded image to normalized model input
+
+Equivalent to transforms.Compose([Resize((224, 224)), ToTensor(),
+Normalize(IMAGENET_MEAN, IMAGENET_STD)]), split into two stages:
+
+  to_uint8(image)    – one PIL resize (bilinear, as torchvision does for
+                       PIL inputs) to a 224 x 224 x 3 uint8 array; the
+                       image is converted to RGB only if it isn't already
+  normalize(arrays)  – stack a list of those arrays into a reusable
+                       per-thread staging buffer and scale/shift the
+                       whole batch at once with precomputed constants
+"""
+import threading
+
+import numpy as np
+import torch
+from PIL import Image
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+class Preprocessor:
+    def __init__(self, size=224, mean=IMAGENET_MEAN, std=IMAGENET_STD, batch_capacity=16):
+        self.size = size
+        self.batch_capacity = batch_capacity
+
+        # x_norm = (x / 255 - mean) / std  ==  x * scale + offset
+        mean = torch.tensor(mean, dtype=torch.float32).view(1, 3, 1, 1)
+        std = torch.tensor(std, dtype=torch.float32).view(1, 3, 1, 1)
+        self._scale = 1.0 / (255.0 * std)
+        self._offset = -mean / std
+
+        self._local = threading.local()
+
+    def to_uint8(self, image):
+        """Resize a PIL image to a size x size x 3 uint8 array"""
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        resized = image.resize((self.size, self.size), Image.BILINEAR)
+        return np.asarray(resized, dtype=np.uint8)
+
+    def _staging(self, count):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or buffer.shape[0] < count:
+            capacity = max(count, self.batch_capacity)
+            buffer = np.empty((capacity, self.size, self.size, 3), dtype=np.uint8)
+            self._local.buffer = buffer
+        return buffer[:count]
+
+    def normalize(self, arrays):
+        """[H, W, 3] uint8 arrays -> normalized float32 [B, 3, H, W] tensor"""
+        staging = self._staging(len(arrays))
+        np.stack(arrays, out=staging)
+
+        batch = torch.empty((len(arrays), 3, self.size, self.size), dtype=torch.float32)
+        batch.copy_(torch.from_numpy(staging).permute(0, 3, 1, 2))
+        return batch.mul_(self._scale).add_(self._offset)
+
+    def __call__(self, images):
+        """PIL images -> normalized batch tensor"""
+        return self.normalize([self.to_uint8(image) for image in images])
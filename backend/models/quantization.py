@@ -0,0 +1,198 @@
+"""
+INT8 post-training static quantization of SimpleCNN
+
+Workflow:
+  1. Calibrate observers on a folder of representative images.
+  2. Convert to an INT8 model, trace + freeze it and save it next to
+     MODEL_PATH (QUANTIZED_MODEL_PATH), tagged with the checkpoint SHA-256.
+  3. Optionally score FP32 and INT8 on a labeled folder (one sub-folder
+     per class name) and write the accuracy delta report beside it.
+
+    python -m backend.models.quantization --calibration-dir DIR [--eval-dir DIR]
+
+Set INFERENCE_BACKEND = "int8" in backend/config.py to serve predictions
+from the saved artifact.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+from backend.models.checkpoint import checkpoint_checksum
+from backend.models.image_folders import list_images, list_labeled_images
+
+_CHECKSUM_KEY = "checkpoint_sha256"
+
+
+# ===============================
+# IMAGE BATCHES
+# ===============================
+def _load_batches(paths, transform, batch_size):
+    for start in range(0, len(paths), batch_size):
+        tensors = []
+        for path in paths[start:start + batch_size]:
+            with Image.open(path) as image:
+                tensors.append(transform(image.convert("RGB")))
+        yield torch.stack(tensors)
+
+
+# ===============================
+# QUANTIZATION
+# ===============================
+def quantize_model(eager_model, calibration_batches, engine="x86"):
+    """
+    Post-training static quantization (FX graph mode).
+
+    calibration_batches is an iterable of [B, 3, 224, 224] tensors used to
+    collect activation ranges. Returns the converted INT8 module.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    torch.backends.quantized.engine = engine
+    eager_model.eval()
+
+    example = (torch.zeros(1, 3, 224, 224),)
+    prepared = prepare_fx(eager_model, get_default_qconfig_mapping(engine), example)
+
+    seen = 0
+    with torch.no_grad():
+        for batch in calibration_batches:
+            prepared(batch)
+            seen += batch.shape[0]
+    if seen == 0:
+        raise ValueError("Calibration needs at least one image")
+
+    return convert_fx(prepared)
+
+
+def save_quantized(quantized_model, path, checksum):
+    """Trace, freeze and save an INT8 module tagged with its checkpoint checksum"""
+    with torch.no_grad():
+        traced = torch.jit.trace(quantized_model, torch.zeros(1, 3, 224, 224))
+    frozen = torch.jit.freeze(traced)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.jit.save(frozen, tmp_path, _extra_files={_CHECKSUM_KEY: checksum})
+    os.replace(tmp_path, path)
+
+
+def load_quantized(path, checkpoint_path, engine="x86"):
+    """
+    Load the INT8 artifact built from checkpoint_path.
+
+    Raises FileNotFoundError when it is missing and ValueError when it was
+    calibrated against a different checkpoint; quantization needs
+    calibration data, so it is never rebuilt implicitly.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"No quantized model at {path}; run "
+            "'python -m backend.models.quantization --calibration-dir DIR'"
+        )
+
+    torch.backends.quantized.engine = engine
+    extra_files = {_CHECKSUM_KEY: ""}
+    module = torch.jit.load(path, map_location="cpu", _extra_files=extra_files)
+
+    stored = extra_files[_CHECKSUM_KEY]
+    if isinstance(stored, bytes):
+        stored = stored.decode()
+    if stored != checkpoint_checksum(checkpoint_path):
+        raise ValueError(
+            f"{path} was calibrated for a different checkpoint; re-run quantization"
+        )
+    return module
+
+
+# ===============================
+# ACCURACY REPORT
+# ===============================
+def _score(model, batches):
+    probs, seconds, count = [], 0.0, 0
+    with torch.no_grad():
+        for batch in batches:
+            start = time.perf_counter()
+            logits = model(batch)
+            seconds += time.perf_counter() - start
+            count += batch.shape[0]
+            probs.append(torch.softmax(logits, dim=1).numpy())
+    return np.concatenate(probs), 1000.0 * seconds / max(count, 1)
+
+
+def accuracy_report(fp32_model, int8_model, samples, transform, batch_size=32):
+    """Compare FP32 and INT8 accuracy, agreement and latency on labeled samples"""
+    if not samples:
+        raise ValueError("Labeled set is empty")
+
+    paths = [path for path, _ in samples]
+    labels = np.array([label for _, label in samples])
+
+    fp32_probs, fp32_ms = _score(fp32_model, _load_batches(paths, transform, batch_size))
+    int8_probs, int8_ms = _score(int8_model, _load_batches(paths, transform, batch_size))
+
+    fp32_pred = fp32_probs.argmax(axis=1)
+    int8_pred = int8_probs.argmax(axis=1)
+    fp32_acc = float((fp32_pred == labels).mean())
+    int8_acc = float((int8_pred == labels).mean())
+
+    return {
+        "samples": len(samples),
+        "fp32_accuracy": fp32_acc,
+        "int8_accuracy": int8_acc,
+        "accuracy_delta": int8_acc - fp32_acc,
+        "prediction_agreement": float((fp32_pred == int8_pred).mean()),
+        "max_probability_diff": float(np.abs(fp32_probs - int8_probs).max()),
+        "fp32_ms_per_image": fp32_ms,
+        "int8_ms_per_image": int8_ms,
+        "speedup": fp32_ms / int8_ms if int8_ms else None,
+    }
+
+
+def main(argv=None):
+    from backend.config import (
+        CLASS_NAMES,
+        MODEL_PATH,
+        QUANTIZATION_ENGINE,
+        QUANTIZED_MODEL_PATH,
+    )
+    from backend.models.model_predictor import _build_model, _get_transform
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calibration-dir", required=True,
+                        help="Folder of representative images")
+    parser.add_argument("--eval-dir",
+                        help="Labeled folder (one sub-folder per class) for the accuracy report")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-calibration-images", type=int, default=512)
+    args = parser.parse_args(argv)
+
+    transform = _get_transform()
+    calibration_paths = list_images(args.calibration_dir)[:args.max_calibration_images]
+
+    fp32_model = _build_model()
+    int8_model = quantize_model(
+        _build_model(),
+        _load_batches(calibration_paths, transform, args.batch_size),
+        engine=QUANTIZATION_ENGINE,
+    )
+    save_quantized(int8_model, QUANTIZED_MODEL_PATH, checkpoint_checksum(MODEL_PATH))
+    print(f"✅ INT8 model calibrated on {len(calibration_paths)} images "
+          f"and saved to {QUANTIZED_MODEL_PATH}")
+
+    if args.eval_dir:
+        samples = list_labeled_images(args.eval_dir, CLASS_NAMES)
+        report = accuracy_report(fp32_model, int8_model, samples, transform,
+                                 batch_size=args.batch_size)
+        report_path = os.path.splitext(QUANTIZED_MODEL_PATH)[0] + "_report.json"
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
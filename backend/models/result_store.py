@@ -0,0 +1,138 @@
+"""
+Persistent store for predictions and explanation heatmaps
+
+Probabilities live in a SQLite database (WAL mode, one connection per
+thread) and heatmaps in a blob directory as compressed uint8 arrays. Rows
+are keyed by image content hash and model fingerprint, so results survive
+process restarts and can be shared by replicas on the same volume.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    image_hash        TEXT NOT NULL,
+    model_fingerprint TEXT NOT NULL,
+    probabilities     BLOB NOT NULL,
+    created_at        REAL NOT NULL,
+    PRIMARY KEY (image_hash, model_fingerprint)
+);
+CREATE TABLE IF NOT EXISTS heatmaps (
+    image_hash        TEXT NOT NULL,
+    model_fingerprint TEXT NOT NULL,
+    method            TEXT NOT NULL,
+    class_idx         INTEGER NOT NULL,
+    blob_name         TEXT NOT NULL,
+    created_at        REAL NOT NULL,
+    PRIMARY KEY (image_hash, model_fingerprint, method, class_idx)
+);
+CREATE INDEX IF NOT EXISTS predictions_by_model
+    ON predictions (model_fingerprint, created_at);
+"""
+
+
+class ResultStore:
+    """SQLite + blob directory store, safe for concurrent readers and writers"""
+
+    def __init__(self, root):
+        self.root = root
+        self.db_path = os.path.join(root, "results.sqlite3")
+        self.blob_dir = os.path.join(root, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------------- PROBABILITIES ----------------
+    def get_probabilities(self, image_hash, model_fingerprint):
+        row = self._connection().execute(
+            "SELECT probabilities FROM predictions "
+            "WHERE image_hash = ? AND model_fingerprint = ?",
+            (image_hash, model_fingerprint),
+        ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).copy()
+
+    def put_probabilities(self, items):
+        """Store [(image_hash, model_fingerprint, probs_np), ...] in one transaction"""
+        now = time.time()
+        rows = [
+            (image_hash, fingerprint, np.asarray(probs, dtype=np.float32).tobytes(), now)
+            for image_hash, fingerprint, probs in items
+        ]
+        if not rows:
+            return
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)", rows
+            )
+
+    def iter_probabilities(self, model_fingerprint, limit=None):
+        """Yield (image_hash, probs_np) for a model, most recent first"""
+        query = (
+            "SELECT image_hash, probabilities FROM predictions "
+            "WHERE model_fingerprint = ? ORDER BY created_at DESC"
+        )
+        params = [model_fingerprint]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        for image_hash, blob in self._connection().execute(query, params):
+            yield image_hash, np.frombuffer(blob, dtype=np.float32).copy()
+
+    # ---------------- HEATMAPS ----------------
+    def _blob_name(self, image_hash, model_fingerprint, method, class_idx):
+        key = f"{image_hash}|{model_fingerprint}|{method}|{class_idx}"
+        name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return os.path.join(name[:2], name + ".npz")
+
+    def get_heatmap(self, image_hash, model_fingerprint, method, class_idx):
+        """Stored heatmap as float32 in [0, 1], or None"""
+        row = self._connection().execute(
+            "SELECT blob_name FROM heatmaps WHERE image_hash = ? AND "
+            "model_fingerprint = ? AND method = ? AND class_idx = ?",
+            (image_hash, model_fingerprint, method, int(class_idx)),
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            with np.load(os.path.join(self.blob_dir, row[0])) as data:
+                return data["cam"].astype(np.float32) / 255.0
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def put_heatmap(self, image_hash, model_fingerprint, method, class_idx, cam):
+        """Quantize a [0, 1] heatmap to uint8 and store it compressed"""
+        blob_name = self._blob_name(image_hash, model_fingerprint, method, class_idx)
+        path = os.path.join(self.blob_dir, blob_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        quantized = np.clip(np.rint(np.asarray(cam) * 255.0), 0, 255).astype(np.uint8)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, cam=quantized)
+        os.replace(tmp_path, path)
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO heatmaps VALUES (?, ?, ?, ?, ?, ?)",
+                (image_hash, model_fingerprint, method, int(class_idx),
+                 blob_name, time.time()),
+            )
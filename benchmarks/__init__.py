@@ -0,0 +1 @@
+"""Performance microbenchmarks"""
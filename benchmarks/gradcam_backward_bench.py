@@ -0,0 +1,68 @@
+"""
+Benchmark: Grad-CAM full backward vs. backward limited to the target layer
+
+Each mode runs in a fresh process so peak RSS is not shared between them.
+
+    python -m benchmarks.gradcam_backward_bench [--repeats 20]
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+import warnings
+
+
+def _run_mode(mode, repeats, queue):
+    warnings.simplefilter("ignore")
+    import torch
+
+    from backend.gradcam.gradcam import GradCAM
+    from backend.models.model_predictor import _load_model
+
+    torch.manual_seed(0)
+    model = _load_model()
+    explainer = GradCAM(model, model.backbone.layer4, mode=mode)
+    inputs = torch.randn(1, 3, 224, 224)
+
+    with torch.no_grad():
+        model(inputs)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    explainer.generate(inputs, 0)  # warm-up
+    start = time.perf_counter()
+    for i in range(repeats):
+        cam = explainer.generate(inputs, i % 5)
+    seconds = (time.perf_counter() - start) / repeats
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((mode, seconds, peak_kb - baseline_kb, cam))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grad-CAM backward benchmark")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    results = {}
+    for mode in ("full", "target"):
+        process = ctx.Process(target=_run_mode, args=(mode, args.repeats, queue))
+        process.start()
+        name, seconds, extra_kb, cam = queue.get()
+        process.join()
+        results[name] = (seconds, extra_kb, cam)
+
+    full_s, full_kb, full_cam = results["full"]
+    target_s, target_kb, target_cam = results["target"]
+
+    print(f"repeats={args.repeats}")
+    print(f"full backward   : {full_s * 1000:8.1f} ms/explanation, "
+          f"peak RSS +{full_kb / 1024:6.1f} MB")
+    print(f"target-layer    : {target_s * 1000:8.1f} ms/explanation, "
+          f"peak RSS +{target_kb / 1024:6.1f} MB ({full_s / target_s:.2f}x faster)")
+    print(f"Max |Δcam|      : {abs(full_cam - target_cam).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
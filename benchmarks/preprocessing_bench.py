@@ -0,0 +1,71 @@
+"""
+Microbenchmark: torchvision Compose vs. the batched Preprocessor
+
+    python -m benchmarks.preprocessing_bench [--batch-size 16] [--source-size 512]
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+import torch
+from PIL import Image
+
+from backend.models.model_predictor import _get_preprocessor, _get_transform
+
+
+def _timeit(fn, repeats):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preprocessing microbenchmark")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--source-size", type=int, default=512)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    images = [
+        Image.fromarray(rng.integers(0, 256, (args.source_size, args.source_size, 3), dtype=np.uint8))
+        for _ in range(args.batch_size)
+    ]
+
+    transform = _get_transform()
+    preprocessor = _get_preprocessor()
+
+    def compose_path():
+        # Previous predict path: convert + Compose per image, then stack
+        return torch.stack([transform(image.convert("RGB")) for image in images])
+
+    def batched_path():
+        return preprocessor(images)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        max_diff = (compose_path() - batched_path()).abs().max().item()
+
+    compose_s = _timeit(compose_path, args.repeats)
+    batched_s = _timeit(batched_path, args.repeats)
+    normalize_s = _timeit(
+        lambda: preprocessor.normalize([preprocessor.to_uint8(i) for i in images]), args.repeats
+    )
+    arrays = [preprocessor.to_uint8(image) for image in images]
+    normalize_only_s = _timeit(lambda: preprocessor.normalize(arrays), args.repeats)
+
+    per_image = 1000.0 / args.batch_size
+    print(f"batch={args.batch_size} source={args.source_size}px repeats={args.repeats}")
+    print(f"Compose (per image)   : {compose_s * per_image:7.3f} ms/image")
+    print(f"Preprocessor          : {batched_s * per_image:7.3f} ms/image "
+          f"({compose_s / batched_s:.2f}x)")
+    print(f"  resize + normalize  : {normalize_s * per_image:7.3f} ms/image")
+    print(f"  normalize only      : {normalize_only_s * per_image:7.3f} ms/image")
+    print(f"Max |difference|      : {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
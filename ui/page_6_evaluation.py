@@ -1,7 +1,202 @@
+import os
+import time
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 
+from backend.config import (
+    CLASS_NAMES,
+    CONFIDENCE_HIGH_TARGET_ACCURACY,
+    CONFIDENCE_MIN_ACCEPTED,
+    CONFIDENCE_MIN_COVERAGE,
+    CONFIDENCE_MODERATE_TARGET_ACCURACY,
+    CONFIDENCE_THRESHOLDS_PATH,
+    EVALUATION_RESULTS_PATH,
+)
+from backend.evaluation.engine import (
+    NORMAL_CLASS,
+    disease_scores,
+    evaluate,
+    load_results,
+    save_results,
+    summarize,
+)
+from backend.evaluation.thresholds import (
+    binary_sweep,
+    choose_operating_points,
+    save_operating_points,
+    sweep,
+)
+from utils.confidence_utils import confidence_thresholds
+
+CURVE_GRID = np.linspace(0, 1, 101)
+
+
+def _ci(interval, index=None, fmt="{:.1%}"):
+    """'low – high' text for a bootstrap interval (or one class of it)"""
+    low, high = interval["low"], interval["high"]
+    if index is not None:
+        low, high = low[index], high[index]
+    if low is None or high is None or np.isnan(low) or np.isnan(high):
+        return "–"
+    return f"{fmt.format(low)} – {fmt.format(high)}"
+
+
+def _ms(value, suffix=" ms"):
+    """Latency text, or '–' when there were no timings to summarize"""
+    return "–" if value is None else f"{value:.0f}{suffix}"
+
+
+def _run_evaluation():
+    """Folder picker + button; evaluates and saves results when clicked"""
+    from backend.models.image_folders import list_labeled_images
+
+    data_dir = st.text_input(
+        "Labeled test folder (one sub-folder per class)",
+        placeholder="/data/test",
+    )
+    if not st.button("▶️ Run Evaluation"):
+        return
+
+    if not data_dir or not os.path.isdir(data_dir):
+        st.error("Folder not found.")
+        return
+
+    samples = list_labeled_images(data_dir, CLASS_NAMES)
+    if not samples:
+        st.error("No images found in sub-folders named after the classes.")
+        return
+
+    with st.spinner(f"Evaluating {len(samples)} images..."):
+        try:
+            results = evaluate(samples)
+        except ValueError as exc:
+            st.error(str(exc))
+            return
+        save_results(results, EVALUATION_RESULTS_PATH)
+
+    failures = results["failures"]
+    st.success(f"Evaluated {len(samples) - len(failures)} images.")
+    if failures:
+        st.warning(f"Skipped {len(failures)} unreadable files:")
+        st.dataframe(pd.DataFrame(failures), width='stretch')
+
+
+def _binary_counts(confusion):
+    """(TN, FP, FN, TP) for Disease vs Normal from the 5-class matrix"""
+    normal = CLASS_NAMES.index(NORMAL_CLASS)
+    disease = [i for i in range(len(CLASS_NAMES)) if i != normal]
+
+    tn = int(confusion[normal, normal])
+    fp = int(confusion[normal, disease].sum())
+    fn = int(confusion[disease, normal].sum())
+    tp = int(confusion[np.ix_(disease, disease)].sum())
+    return tn, fp, fn, tp
+
+
+def _curves_on_grid(curves, x_key, y_key, envelope=False):
+    """Resample each class's curve onto CURVE_GRID for one line chart"""
+    columns = {}
+    for name, curve in zip(CLASS_NAMES, curves):
+        y = curve[y_key]
+        if envelope:
+            # Interpolated precision: best precision at this recall or above
+            y = np.maximum.accumulate(y[::-1])[::-1]
+        columns[name] = np.interp(CURVE_GRID, curve[x_key], y)
+    return pd.DataFrame(columns, index=CURVE_GRID)
+
+
+def _render_threshold_analysis(results):
+    """Threshold sweep charts, a threshold explorer and operating-point export"""
+    labels, probabilities = results["labels"], results["probabilities"]
+    result = sweep(labels, probabilities)
+    thresholds = result["thresholds"]
+
+    is_disease = labels != CLASS_NAMES.index(NORMAL_CLASS)
+    disease = binary_sweep(is_disease, disease_scores(probabilities, CLASS_NAMES))
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("**Disease vs Normal** (flag when P(disease) ≥ threshold)")
+        st.line_chart(pd.DataFrame({
+            "Recall (Disease)": disease["recall"],
+            "Precision (Disease)": disease["precision"],
+        }, index=pd.Index(thresholds, name="Threshold")))
+
+    with col2:
+        st.markdown("**Top-1 confidence** (accept when confidence ≥ threshold)")
+        st.line_chart(pd.DataFrame({
+            "Coverage": result["coverage"],
+            "Accuracy of accepted": result["accuracy"],
+        }, index=pd.Index(thresholds, name="Threshold")))
+
+    threshold = st.slider("Confidence threshold", 0.0, 1.0, 0.5, 0.001, format="%.3f")
+    i = int(np.searchsorted(thresholds, threshold))
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Coverage", f"{result['coverage'][i]:.1%}")
+    col2.metric("Accuracy of accepted", f"{np.nan_to_num(result['accuracy'][i]):.1%}")
+    col3.metric("Disease recall at this cut-off", f"{disease['recall'][i]:.1%}")
+
+    st.dataframe(pd.DataFrame({
+        "Recall": result["recall"][i].round(3),
+        "Precision": np.nan_to_num(result["precision"][i]).round(3),
+        "Coverage": result["coverage_per_class"][i].round(3),
+    }, index=CLASS_NAMES), width='stretch')
+
+    # ---------- Operating points -> confidence levels ----------
+    st.markdown("**Confidence levels from operating points**")
+
+    col1, col2 = st.columns(2)
+    high_target = col1.number_input(
+        "High: accuracy of accepted ≥", 0.5, 1.0, CONFIDENCE_HIGH_TARGET_ACCURACY, 0.01
+    )
+    moderate_target = col2.number_input(
+        "Moderate: accuracy of accepted ≥", 0.5, 1.0, CONFIDENCE_MODERATE_TARGET_ACCURACY, 0.01
+    )
+    points = choose_operating_points(
+        result,
+        high_target,
+        moderate_target,
+        min_coverage=CONFIDENCE_MIN_COVERAGE,
+        min_accepted=CONFIDENCE_MIN_ACCEPTED,
+    )
+
+    current_high, current_moderate = confidence_thresholds()
+    st.dataframe(pd.DataFrame({
+        "Current threshold": [current_high, current_moderate],
+        "Proposed threshold": [
+            points[level]["threshold"] if points[level] else None
+            for level in ("high", "moderate")
+        ],
+        "Coverage": [
+            points[level]["coverage"] if points[level] else None
+            for level in ("high", "moderate")
+        ],
+        "Accuracy": [
+            points[level]["accuracy"] if points[level] else None
+            for level in ("high", "moderate")
+        ],
+    }, index=["High", "Moderate"]), width='stretch')
+
+    if points["high"] is None or points["moderate"] is None:
+        st.warning(
+            "No threshold reaches one of the targets while accepting at least "
+            f"{CONFIDENCE_MIN_ACCEPTED} images ({CONFIDENCE_MIN_COVERAGE:.0%}) "
+            "of this evaluation set."
+        )
+    elif st.button("💾 Use as confidence levels"):
+        save_operating_points(
+            points,
+            CONFIDENCE_THRESHOLDS_PATH,
+            model_fingerprint=results["model_fingerprint"],
+            samples=int(len(labels)),
+        )
+        st.success("Confidence levels updated for the Prediction page.")
+
+
 def render_evaluation():
     """Page 6: Evaluation & Results – Medical AI Performance"""
 
@@ -19,6 +214,34 @@ def render_evaluation():
     **Disease vs Normal** cases under different conditions.
     """)
 
+    with st.expander("🔁 Evaluate on a labeled folder"):
+        _run_evaluation()
+
+    results = load_results(EVALUATION_RESULTS_PATH)
+    if results is None:
+        st.info(
+            "No evaluation results yet. Run an evaluation above or with "
+            "`python -m backend.evaluation.engine --data-dir DIR`."
+        )
+        return
+
+    summary = summarize(results)
+    latency = summary["latency"]
+    confusion = summary["confusion"]
+    tn, fp, fn, tp = _binary_counts(confusion)
+
+    st.caption(
+        f"Model {results['model_fingerprint'][:12]} · evaluated "
+        f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(results['created_at']))} · "
+        f"{results['scored']} images scored, {results['reused']} reused from cache"
+        + (f", {len(results['failures'])} unreadable skipped" if results.get("failures") else "")
+    )
+    if latency["images_per_second"] is not None:
+        st.caption(
+            f"Batched scoring: {latency['batched_ms_per_image']:.0f} ms per image, "
+            f"{latency['images_per_second']:.1f} images/s end to end"
+        )
+
     # ================= OVERALL METRICS =================
     st.markdown("""
     <div class="card">
@@ -28,47 +251,66 @@ def render_evaluation():
 
     col1, col2, col3, col4 = st.columns(4)
 
+    intervals = summary["intervals"]
     with col1:
-        st.metric("Accuracy", "90%", "+12% vs baseline")
+        st.metric(
+            "Accuracy",
+            f"{summary['accuracy']:.1%}",
+            f"{intervals['confidence']:.0%} CI {_ci(intervals['accuracy'])}"
+            if intervals else "5-class",
+            delta_color="off",
+        )
 
     with col2:
-        st.metric("F1-Score", "0.91", "Balanced metric")
+        st.metric("Macro F1-Score", f"{summary['macro_f1']:.2f}", "Balanced metric")
 
     with col3:
-        st.metric("Test Samples", "1,000", "Held-out data")
+        st.metric("Test Samples", f"{summary['samples']:,}", "Held-out data")
 
     with col4:
-        st.metric("Inference Time", "90 ms", "Per image (GPU)")
+        st.metric(
+            "Inference Time",
+            _ms(latency["single_ms_p50"]),
+            "Per image (batch of 1)",
+        )
 
     # ================= CONFUSION MATRIX =================
     st.markdown("""
     <div class="card">
-        <h3>🔄 Confusion Matrix (Disease vs Normal)</h3>
+        <h3>🔄 Confusion Matrix</h3>
     </div>
     """, unsafe_allow_html=True)
 
     cm = pd.DataFrame(
-        [[450, 50],
-         [40, 460]],
-        columns=["Predicted Normal", "Predicted Disease"],
-        index=["Actual Normal", "Actual Disease"]
+        confusion,
+        columns=[f"Predicted {name}" for name in CLASS_NAMES],
+        index=[f"Actual {name}" for name in CLASS_NAMES],
     )
+    st.dataframe(cm, width='stretch')
 
+    per_class = summary["per_class"]
     col1, col2 = st.columns(2)
 
     with col1:
-        st.dataframe(cm, width='stretch')
+        per_class_df = pd.DataFrame({
+            "Precision": per_class["precision"].round(3),
+            "Recall": per_class["recall"].round(3),
+            "F1": per_class["f1"].round(3),
+            "Support": per_class["support"],
+        }, index=CLASS_NAMES)
+        if intervals:
+            per_class_df.insert(2, "Recall CI", [
+                _ci(intervals["recall"], i, "{:.2f}") for i in range(len(CLASS_NAMES))
+            ])
+        st.dataframe(per_class_df, width='stretch')
 
     with col2:
-        st.markdown("""
-        **Interpretation (Medical Perspective):**
-        - **True Positives (460)**: Disease correctly detected
-        - **False Negatives (40)** ⚠️: Disease missed (critical risk)
-        - **False Positives (50)**: Normal flagged as disease
-        - **True Negatives (450)**: Normal correctly identified
-
-        **Key Insight:**  
-        False negatives are minimized, which is crucial in medical screening.
+        st.markdown(f"""
+        **Disease vs Normal (Medical Perspective):**
+        - **True Positives ({tp})**: Disease correctly detected
+        - **False Negatives ({fn})** ⚠️: Disease missed (critical risk)
+        - **False Positives ({fp})**: Normal flagged as disease
+        - **True Negatives ({tn})**: Normal correctly identified
         """)
 
     # ================= ROC CURVE =================
@@ -78,22 +320,29 @@ def render_evaluation():
     </div>
     """, unsafe_allow_html=True)
 
-    fpr = np.linspace(0, 1, 50)
-    tpr = 1 - np.exp(-4 * fpr)  # Smooth realistic curve
-
-    roc_df = pd.DataFrame({
-        "False Positive Rate": fpr,
-        "True Positive Rate": tpr
-    })
-
-    st.line_chart(roc_df.set_index("False Positive Rate"))
-
-    st.markdown("""
-    **ROC-AUC ≈ 0.93**
-
-    ✔ High area under curve  
-    ✔ Model separates disease from normal effectively  
-    ✔ Better than random guessing (AUC = 0.5)
+    roc_df = _curves_on_grid(summary["curves"], "fpr", "tpr")
+    roc_df.index.name = "False Positive Rate"
+    st.line_chart(roc_df)
+
+    auc_df = pd.DataFrame({
+        "ROC-AUC (one-vs-rest)": [round(c["roc_auc"], 3) for c in summary["curves"]],
+        "Average Precision": [round(c["average_precision"], 3) for c in summary["curves"]],
+    }, index=CLASS_NAMES)
+    disease_ci = ""
+    if intervals:
+        auc_df.insert(1, "AUC CI", [
+            _ci(intervals["auc"], i, "{:.3f}") for i in range(len(CLASS_NAMES))
+        ])
+        disease_ci = (
+            f" ({intervals['confidence']:.0%} CI "
+            f"{_ci(intervals['binary_auc'], fmt='{:.2f}')})"
+        )
+    st.dataframe(auc_df, width='stretch')
+
+    st.markdown(f"""
+    **Disease vs Normal ROC-AUC ≈ {summary['disease_roc']['auc']:.2f}**{disease_ci}
+
+    Random guessing scores 0.5; 1.0 is perfect separation.
     """)
 
     # ================= PR CURVE =================
@@ -103,15 +352,9 @@ def render_evaluation():
     </div>
     """, unsafe_allow_html=True)
 
-    recall = np.linspace(0, 1, 50)
-    precision = 1 / (1 + recall**1.5)
-
-    pr_df = pd.DataFrame({
-        "Recall": recall,
-        "Precision": precision
-    })
-
-    st.line_chart(pr_df.set_index("Recall"))
+    pr_df = _curves_on_grid(summary["curves"], "recall", "precision", envelope=True)
+    pr_df.index.name = "Recall"
+    st.line_chart(pr_df)
 
     st.markdown("""
     **Why PR Curve Matters More Than ROC Here:**
@@ -127,13 +370,7 @@ def render_evaluation():
     </div>
     """, unsafe_allow_html=True)
 
-    threshold_df = pd.DataFrame({
-        "Confidence Threshold": [0.40, 0.50, 0.60, 0.70, 0.80],
-        "Recall (Disease)": [0.95, 0.91, 0.87, 0.80, 0.72],
-        "Precision (Disease)": [0.78, 0.85, 0.89, 0.93, 0.96]
-    })
-
-    st.line_chart(threshold_df.set_index("Confidence Threshold"))
+    _render_threshold_analysis(results)
 
     st.info("""
     **Medical Trade-off Decision:**
@@ -150,6 +387,8 @@ def render_evaluation():
     </div>
     """, unsafe_allow_html=True)
 
+    disease_recall = tp / max(tp + fn, 1)
+
     readiness_df = pd.DataFrame({
         "Criterion": [
             "Accuracy",
@@ -161,12 +400,12 @@ def render_evaluation():
             "Clinical Validation"
         ],
         "Status": [
-            "90% ✅",
-            "92% ✅",
-            "Low (4%) ✅",
-            "<100 ms ✅",
+            f"{summary['accuracy']:.0%}",
+            f"{disease_recall:.0%}",
+            f"{1 - disease_recall:.0%}",
+            _ms(latency["single_ms_p50"], " ms per image"),
             "Stable across datasets ✅",
-            "Planned (Grad-CAM) ⏳",
+            "Grad-CAM ✅",
             "Pending expert review ⏳"
         ]
     })
@@ -176,10 +415,9 @@ def render_evaluation():
     st.success("""
     **Final Evaluation Summary**
 
-    ✔ Model demonstrates strong disease detection capability  
-    ✔ Synthetic data significantly improves recall and robustness  
-    ✔ Suitable for **clinical decision support**, not autonomous diagnosis  
+    ✔ Metrics above are computed from the latest evaluation run  
+    ✔ Suitable for **clinical decision support**, not autonomous diagnosis
 
     **Key Message:**  
-    The model is reliable enough to assist doctors, not replace them.
+    The model is meant to assist doctors, not replace them.
     """)
@@ -1,11 +1,11 @@
 import streamlit as st
 import pandas as pd
-from PIL import Image
 import datetime
 
+from backend.models.image_decoding import ImageDecodeError
 from backend.models.model_predictor import predict_image
 from utils.confidence_utils import confidence_label, get_confidence_message
-from utils.image_utils import generate_mock_gradcam
+from utils.image_utils import generate_mock_gradcam, load_image
 from utils.pdf_generator import generate_pdf_report
 
 
@@ -36,9 +36,14 @@ def render_prediction():
         type=["png", "jpg", "jpeg"]
     )
 
+    image = None
     if uploaded_file:
-        image = Image.open(uploaded_file).convert("RGB")
+        try:
+            image = load_image(uploaded_file)
+        except ImageDecodeError as exc:
+            st.error(f"Could not load image: {exc}")
 
+    if image is not None:
         col1, col2 = st.columns([1, 1])
 
         # ---------------- IMAGE PREVIEW ----------------
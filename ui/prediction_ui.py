@@ -1,10 +1,11 @@
 import streamlit as st
 import pandas as pd
-from PIL import Image
 import datetime
 
-from backend.inference import predict_image, _load_model, _get_transform, _get_device
-from backend.gradcam.gradcam import generate_real_gradcam
+from backend.models.image_decoding import ImageDecodeError
+from backend.models.model_predictor import predict_and_explain
+from backend.gradcam.rendering import render_overlay
+from utils.image_utils import load_image
 
 from utils.confidence_utils import confidence_label, get_confidence_message
 from utils.pdf_generator import generate_pdf_report
@@ -37,9 +38,14 @@ def render_prediction():
         type=["png", "jpg", "jpeg"]
     )
 
+    image = None
     if uploaded_file:
-        image = Image.open(uploaded_file).convert("RGB")
+        try:
+            image = load_image(uploaded_file)
+        except ImageDecodeError as exc:
+            st.error(f"Could not load image: {exc}")
 
+    if image is not None:
         col1, col2 = st.columns([1, 1])
 
         # ---------------- IMAGE PREVIEW ----------------
@@ -61,8 +67,9 @@ def render_prediction():
 
         # ---------------- RUN INFERENCE ----------------
         if run:
+            # Prediction and Grad-CAM share one forward pass
             with st.spinner("Running AI inference..."):
-                result = predict_image(image)
+                result = predict_and_explain(image)
 
             predicted_class = result["prediction"]
             confidence = result["confidence"]        # 0–1
@@ -109,19 +116,7 @@ def render_prediction():
 
             gradcam_img = None
             try:
-                model = _load_model()
-                transform = _get_transform()
-                device = _get_device()
-
-                class_idx = list(probabilities.keys()).index(predicted_class)
-
-                gradcam_img = generate_real_gradcam(
-                    model=model,
-                    image_pil=image,
-                    transform=transform,
-                    device=device,
-                    class_idx=class_idx
-                )
+                gradcam_img = render_overlay(image, result["cam"], width=280)
             except Exception:
                 gradcam_img = None
 
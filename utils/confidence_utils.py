@@ -1,21 +1,77 @@
 """
 Confidence level classification utilities
 """
+import os
 
+from backend.config import (
+    CONFIDENCE_HIGH_THRESHOLD,
+    CONFIDENCE_MODERATE_THRESHOLD,
+    CONFIDENCE_THRESHOLDS_PATH,
+)
 
-def confidence_label(probability):
+_loaded = {"mtime": None, "thresholds": None, "fingerprint": None, "warned": None}
+
+
+def confidence_thresholds():
+    """
+    (high, moderate) cut-offs: the exported operating points when present
+    and tuned for the current model, otherwise the defaults from
+    backend.config. Re-read when the file changes.
+    """
+    defaults = (CONFIDENCE_HIGH_THRESHOLD, CONFIDENCE_MODERATE_THRESHOLD)
+    try:
+        mtime = os.path.getmtime(CONFIDENCE_THRESHOLDS_PATH)
+    except OSError:
+        return defaults
+
+    if _loaded["mtime"] != mtime:
+        from backend.evaluation.thresholds import load_operating_points
+
+        config = load_operating_points(CONFIDENCE_THRESHOLDS_PATH)
+        try:
+            _loaded["thresholds"] = (float(config["high"]), float(config["moderate"]))
+            _loaded["fingerprint"] = config.get("model_fingerprint")
+        except (TypeError, KeyError, ValueError, AttributeError):
+            _loaded["thresholds"] = None
+        _loaded["mtime"] = mtime
+
+    if _loaded["thresholds"] is None:
+        return defaults
+
+    # Cut-offs tuned on another checkpoint or backend don't carry over
+    fingerprint = _loaded["fingerprint"]
+    if fingerprint is not None:
+        from backend.models.model_predictor import model_fingerprint
+
+        current = model_fingerprint()
+        if fingerprint != current:
+            if _loaded["warned"] != (fingerprint, current):
+                print(
+                    f"⚠️ {CONFIDENCE_THRESHOLDS_PATH} was exported for another model; "
+                    "using the default confidence thresholds"
+                )
+                _loaded["warned"] = (fingerprint, current)
+            return defaults
+
+    return _loaded["thresholds"]
+
+
+def confidence_label(probability, thresholds=None):
     """
     Convert probability to confidence level
     
     Args:
         probability (float): Confidence value (0-1)
+        thresholds (tuple): (high, moderate) cut-offs; defaults to
+            confidence_thresholds()
         
     Returns:
         str: "High", "Moderate", or "Low"
     """
-    if probability >= 0.80:
+    high, moderate = thresholds or confidence_thresholds()
+    if probability >= high:
         return "High"
-    elif probability >= 0.60:
+    elif probability >= moderate:
         return "Moderate"
     else:
         return "Low"
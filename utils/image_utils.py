@@ -4,6 +4,31 @@ Image processing and visualization utilities
 from PIL import Image, ImageDraw
 import random
 
+from backend.config import DECODE_TARGET_SIZE, MAX_IMAGE_PIXELS, MAX_UPLOAD_BYTES
+from backend.models.image_decoding import decode_image
+
+
+def load_image(source):
+    """
+    Decode an uploaded image to RGB at a size sufficient for inference
+    and display, rejecting oversized or malformed files
+    
+    Args:
+        source: bytes, path or file-like object (e.g. Streamlit upload)
+        
+    Returns:
+        PIL.Image: RGB image
+        
+    Raises:
+        ImageDecodeError: file is not an image or exceeds the limits
+    """
+    return decode_image(
+        source,
+        target_size=DECODE_TARGET_SIZE,
+        max_pixels=MAX_IMAGE_PIXELS,
+        max_bytes=MAX_UPLOAD_BYTES,
+    )
+
 
 def generate_mock_gradcam(image):
     """